@@ -0,0 +1,109 @@
+"""Admission control: turn away excess requests instead of queuing them
+
+Routes are grouped into classes in the ADMISSION_CONTROL setting, e.g.:
+
+    ADMISSION_CONTROL = {
+        'reports': {'prefixes': ['/reports/'], 'limit': 2, 'max_wait': 0},
+        'events': {'prefixes': ['/events'], 'limit': 8, 'max_wait': 0.05},
+    }
+
+Each class may run at most 'limit' requests at a time. A request that can't
+get a slot within 'max_wait' seconds is answered right away with a 503 and a
+Retry-After header, so a burst of slow report requests can't tie up every
+worker while cheap requests like /login wait behind them. Requests that match
+no class are never limited. A streamed response, like the .ics feed, holds
+its slot until its whole body has been sent.
+"""
+import collections
+import threading
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from levelup.streams import is_streaming, on_close
+
+# seconds the client is told to wait before trying again
+DEFAULT_RETRY_AFTER = 1
+
+_lock = threading.Lock()
+_shed = collections.Counter()
+_admitted = collections.Counter()
+
+
+class RouteClass:
+    """The concurrency limit for one group of URL prefixes"""
+
+    def __init__(self, name, prefixes, limit, max_wait=0, retry_after=DEFAULT_RETRY_AFTER):
+        self.name = name
+        self.prefixes = tuple(prefixes)
+        self.slots = threading.BoundedSemaphore(limit) if limit > 0 else None
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+
+    def matches(self, path):
+        return path.startswith(self.prefixes)
+
+    def acquire(self):
+        if self.slots is None:
+            return False
+        if self.max_wait > 0:
+            return self.slots.acquire(timeout=self.max_wait)
+        return self.slots.acquire(blocking=False)
+
+    def release(self):
+        self.slots.release()
+
+
+class AdmissionControlMiddleware:
+    """Enforce the ADMISSION_CONTROL limits on every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'ADMISSION_CONTROL', {})
+        self.route_classes = [RouteClass(name, **options) for name, options in config.items()]
+
+    def __call__(self, request):
+        route_class = next((r for r in self.route_classes if r.matches(request.path)), None)
+        if route_class is None:
+            return self.get_response(request)
+
+        if not route_class.acquire():
+            with _lock:
+                _shed[route_class.name] += 1
+            response = JsonResponse(
+                {'message': 'The server is busy, please try again shortly'}, status=503)
+            response['Retry-After'] = str(route_class.retry_after)
+            return response
+
+        with _lock:
+            _admitted[route_class.name] += 1
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            route_class.release()
+            raise
+        # a streamed body is still being made after this returns, so its
+        # slot is only given back when the server closes the response
+        if is_streaming(response):
+            on_close(response, route_class.release)
+        else:
+            route_class.release()
+        return response
+
+
+def admission_counts():
+    """Return the admitted and shed request counts for each route class"""
+    with _lock:
+        return {'admitted': dict(_admitted), 'shed': dict(_shed)}
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admission_stats(request):
+    '''Reports how many requests each route class admitted and shed
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    return Response(admission_counts())
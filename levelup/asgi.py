@@ -3,6 +3,9 @@ ASGI config for levelup project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with uvicorn, e.g. `pipenv run uvicorn levelup.asgi:application`;
+`manage.py runserver` is WSGI only and can't serve the /stream/ URLs.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 """
@@ -13,4 +16,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'levelup.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after Django is set up, since it uses the models
+from levelupapi.live import sse_application  # pylint: disable=wrong-import-position
+
+
+async def application(scope, receive, send):
+    """Send the Server-Sent Event streams to levelupapi.live, the rest to Django"""
+    if scope['type'] == 'http' and scope['path'].startswith('/stream/'):
+        await sse_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
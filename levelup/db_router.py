@@ -0,0 +1,160 @@
+"""Send safe reads to read replicas, everything else to the primary database
+
+Replicas are listed by alias in the REPLICA_DATABASES setting. Reads only go
+to a replica while ReplicaMiddleware is handling a GET, HEAD or OPTIONS
+request from a client that hasn't written anything in the last
+REPLICA_PIN_SECONDS. Writes, reads made while handling a write, management
+commands and migrations always use 'default'.
+
+After a write the client is pinned to the primary for a short while, so it
+reads back its own changes even when a replica lags behind. The pin is kept
+in the cache when every server process shares it (see
+levelupapi/shared_cache.py); with a process-local cache the next request may
+land on another worker, so the pin goes to the client as a signed cookie
+instead. A replica that can't be reached is skipped until it passes a
+health check again.
+"""
+import contextlib
+import contextvars
+import hashlib
+import os
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from levelup.streams import is_streaming, run_within
+from levelupapi import shared_cache
+
+# seconds a client keeps reading from the primary after a write
+DEFAULT_PIN_SECONDS = 5
+
+# seconds a replica's health check result is trusted for
+HEALTH_CHECK_SECONDS = 10
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# the signed cookie pinning a client when the cache isn't shared
+PIN_COOKIE = 'replica_pin'
+
+_replicas_allowed = contextvars.ContextVar('replicas_allowed', default=False)
+
+_health_lock = threading.Lock()
+_health = {}
+
+
+@contextlib.contextmanager
+def use_replicas(allowed=True):
+    """Let ORM reads and read_connection() use replicas inside the block"""
+    token = _replicas_allowed.set(allowed)
+    try:
+        yield
+    finally:
+        _replicas_allowed.reset(token)
+
+
+def replica_is_up(alias):
+    """Return True when the replica 'alias' answers, caching the answer"""
+    now = time.monotonic()
+    with _health_lock:
+        healthy, checked_at = _health.get(alias, (False, None))
+        if checked_at is not None and now - checked_at < HEALTH_CHECK_SECONDS:
+            return healthy
+
+    healthy = check_replica(alias)
+    with _health_lock:
+        _health[alias] = (healthy, now)
+    return healthy
+
+
+def check_replica(alias):
+    """Run a tiny query against the replica to see that it is usable"""
+    database = connections.databases[alias]
+    # SQLite creates a missing file on connect, so check the file first
+    if database['ENGINE'].endswith('sqlite3') and not os.path.exists(database['NAME']):
+        return False
+    try:
+        with connections[alias].cursor() as db_cursor:
+            db_cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+        return True
+    except Exception:  # pylint: disable=broad-except
+        connections[alias].close()
+        return False
+
+
+def replica_alias():
+    """Pick a healthy replica for a read, or None to read from the primary"""
+    if not _replicas_allowed.get():
+        return None
+    replicas = [alias for alias in getattr(settings, 'REPLICA_DATABASES', [])
+                if replica_is_up(alias)]
+    if not replicas:
+        return None
+    return random.choice(replicas)
+
+
+def read_connection():
+    """The connection raw SQL reads should use, e.g. in levelupreports"""
+    return connections[replica_alias() or DEFAULT_DB_ALIAS]
+
+
+class ReplicaRouter:
+    """Database router for the primary and its read replicas"""
+
+    def db_for_read(self, model, **hints):
+        return replica_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold copies of the same data as the primary
+        return True
+
+
+class ReplicaMiddleware:
+    """Decide for every request whether its reads may use a replica"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        write = request.method not in SAFE_METHODS
+        allowed = not write and not is_pinned(request)
+
+        with use_replicas(allowed):
+            response = self.get_response(request)
+        # a streamed body runs its queries while it is sent, after this returns
+        if is_streaming(response):
+            run_within(response, lambda: use_replicas(allowed))
+
+        if write:
+            pin(request, response)
+        return response
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS)
+
+
+def is_pinned(request):
+    """Whether the client wrote something in the last REPLICA_PIN_SECONDS"""
+    if shared_cache.is_shared():
+        return cache.get(client_pin_key(request)) is not None
+    return request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_COOKIE, max_age=pin_seconds()) is not None
+
+
+def pin(request, response):
+    """Send the client's reads to the primary for the next REPLICA_PIN_SECONDS"""
+    if shared_cache.is_shared():
+        cache.set(client_pin_key(request), True, pin_seconds())
+    else:
+        response.set_signed_cookie(PIN_COOKIE, '1', salt=PIN_COOKIE, max_age=pin_seconds(),
+                                   httponly=True, samesite='Lax')
+
+
+def client_pin_key(request):
+    """Cache key naming the client, by auth token or else by address"""
+    client = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return 'replica-pin:' + hashlib.sha256(client.encode()).hexdigest()
@@ -0,0 +1,141 @@
+"""Spot N+1 queries while developing and in tests
+
+Every SQL statement run during a request (or a test block) is reduced to a
+fingerprint: the same statement with its literal values taken out. When one
+fingerprint runs again and again, some code is most likely loading related
+rows one object at a time, e.g. reading `event.attendees.all()` inside a loop
+instead of using prefetch_related().
+
+QueryCheckMiddleware logs those repeated statements together with the line
+of our code that ran them. It is only added to MIDDLEWARE while DEBUG is on.
+QueryBudgetMixin lets a test fail when a view goes over its query budget.
+"""
+import collections
+import contextlib
+import logging
+import os
+import re
+import traceback
+from django.conf import settings
+from django.db import connections
+from levelup.streams import is_streaming, run_within
+
+logger = logging.getLogger('levelup.queries')
+
+# how many times one statement may repeat in a request before it is reported
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_string = re.compile(r"'(?:[^']|'')*'")
+_number = re.compile(r'\b\d+(?:\.\d+)?\b')
+_in_list = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_space = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Return the shape of a SQL statement, without its literal values"""
+    sql = _string.sub('?', sql)
+    sql = _number.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _in_list.sub('IN (...)', sql)
+    return _space.sub(' ', sql).strip()
+
+
+def caller():
+    """Return the innermost stack frame in our apps, skipping libraries
+
+    Frames in the levelup project package are skipped too, since those are
+    the middleware that wrap every request rather than the code that ran it.
+    """
+    base = str(settings.BASE_DIR)
+    project = os.path.join(settings.BASE_DIR, 'levelup', '')
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(base) and not frame.filename.startswith(project) \
+                and 'site-packages' not in frame.filename:
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+
+class QueryLog:
+    """Counts the statements run on every database while it is active"""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.callers = {}
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = fingerprint(sql)
+        self.counts[shape] += 1
+        self.total += 1
+        if shape not in self.callers:
+            self.callers[shape] = caller()
+        return execute(sql, params, many, context)
+
+    @contextlib.contextmanager
+    def record(self):
+        with contextlib.ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    def repeated(self, threshold):
+        """Return (statement, count, caller) for shapes run 'threshold' times or more"""
+        return [(shape, count, self.callers[shape])
+                for shape, count in self.counts.most_common() if count >= threshold]
+
+
+class QueryCheckMiddleware:
+    """Log the statements a request repeats too often, and count its queries"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+
+    def __call__(self, request):
+        query_log = QueryLog()
+        with query_log.record():
+            response = self.get_response(request)
+
+        # the header goes out before a streamed body is made, so it only
+        # counts the queries up to here; the body's are still checked
+        response['X-Query-Count'] = str(query_log.total)
+        if is_streaming(response):
+            run_within(response, lambda: self.checked(request, query_log))
+        else:
+            self.report(request, query_log)
+        return response
+
+    @contextlib.contextmanager
+    def checked(self, request, query_log):
+        """Go on recording into 'query_log' inside the block, then report it"""
+        with query_log.record():
+            yield
+        self.report(request, query_log)
+
+    def report(self, request, query_log):
+        for shape, count, where in query_log.repeated(self.threshold):
+            logger.warning('Possible N+1 in %s %s: ran %d times from %s: %s',
+                           request.method, request.path, count, where, shape)
+
+
+class QueryBudgetMixin:
+    """TestCase mixin to fail tests that run more queries than expected"""
+
+    @contextlib.contextmanager
+    def assertQueryBudget(self, total=None, repeats=DEFAULT_REPEAT_THRESHOLD):  # pylint: disable=invalid-name
+        """Fail when the block runs more than 'total' queries, or repeats one too often
+
+        'repeats' is how many times a single statement may run, e.g. once
+        for each object in a list; use a number lower than the size of the
+        list the test builds.
+        """
+        query_log = QueryLog()
+        with query_log.record():
+            yield query_log
+
+        problems = [f'  ran {count} times from {where}:\n    {shape}'
+                    for shape, count, where in query_log.repeated(repeats + 1)]
+        if total is not None and query_log.total > total:
+            problems.insert(0, f'  {query_log.total} queries, budget is {total}')
+        if problems:
+            self.fail('Query budget exceeded:\n' + '\n'.join(problems))
@@ -67,6 +67,9 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'levelup.admission.AdmissionControlMiddleware',
+    'levelup.slowqueries.SlowQueryMiddleware',
+    'levelup.db_router.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -74,13 +77,33 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]  
 
+# While developing, log statements a request repeats at least this many
+# times, a sign of an N+1 query. See levelup/querycheck.py.
+QUERY_REPEAT_THRESHOLD = 5
+
+if DEBUG:
+    MIDDLEWARE.insert(0, 'levelup.querycheck.QueryCheckMiddleware')
+
+# Statements slower than this many milliseconds are logged with their query
+# plan, and the slowest SLOW_QUERY_TOP shapes are listed for staff at
+# /stats/slowqueries. See levelup/slowqueries.py. None turns the log off.
+SLOW_QUERY_MS = 100
+SLOW_QUERY_TOP = 50
+
+# Concurrency limits per group of routes, see levelup/admission.py.
+# 'limit' is how many requests of the group may run at once, 'max_wait' how
+# many seconds a request may wait for a slot before it gets a 503.
+ADMISSION_CONTROL = {
+    'reports': {'prefixes': ['/reports/'], 'limit': 2, 'max_wait': 0},
+    'events': {'prefixes': ['/events'], 'limit': 8, 'max_wait': 0.05},
+}
+
 ROOT_URLCONF = 'levelup.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -88,10 +111,34 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # templates are read from disk on every render while DEBUG is on,
+            # so edits show up right away. In production they are compiled
+            # once and kept in memory by the cached loader.
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ] if DEBUG else [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Used by the {% cache %} fragments in the report templates and the API's
+# caches. The event listing cache is only used with a backend every server
+# process shares, see levelupapi/shared_cache.py, e.g.
+#   LEVELUP_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   LEVELUP_CACHE_LOCATION=redis://127.0.0.1:6379
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('LEVELUP_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('LEVELUP_CACHE_LOCATION', ''),
+    }
+}
+
 WSGI_APPLICATION = 'levelup.wsgi.application'
 
 
@@ -105,6 +152,33 @@ DATABASES = {
     }
 }
 
+# Read replicas, see levelup/db_router.py. To try this locally, copy
+# db.sqlite3 to a second file and point LEVELUP_REPLICA_DB at it.
+REPLICA_DATABASES = []
+
+if os.environ.get('LEVELUP_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['LEVELUP_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append('replica')
+
+DATABASE_ROUTERS = ['levelup.db_router.ReplicaRouter']
+
+# seconds a client keeps reading from the primary after it wrote something
+REPLICA_PIN_SECONDS = 5
+
+# where the run_tasks worker writes the files of report jobs, see
+# levelupreports/jobs.py
+REPORT_JOB_DIR = os.environ.get('LEVELUP_REPORT_JOB_DIR', str(BASE_DIR / 'report_jobs'))
+
+# seconds a finished report job and its file are kept, and seconds a job may
+# take before it is marked as failed; `python manage.py cleanup_report_jobs`
+# applies both, run it from cron
+REPORT_JOB_TTL = 7 * 24 * 60 * 60
+REPORT_JOB_TIMEOUT = 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -0,0 +1,121 @@
+"""Log slow SQL statements together with their query plan
+
+SlowQueryMiddleware times every statement a request runs, the ORM's as well
+as the raw SQL of levelupreports. A statement slower than SLOW_QUERY_MS is
+logged with its parameters, the line of our code that ran it and the
+database's plan for it (EXPLAIN QUERY PLAN on SQLite, EXPLAIN elsewhere).
+
+The slowest SLOW_QUERY_TOP statement shapes are also kept in memory, and
+staff can read them at /stats/slowqueries.
+"""
+import contextlib
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import connections
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from levelup.querycheck import caller, fingerprint
+from levelup.streams import is_streaming, run_within
+
+logger = logging.getLogger('levelup.queries.slow')
+
+DEFAULT_SLOW_QUERY_MS = 100
+DEFAULT_SLOW_QUERY_TOP = 50
+
+_lock = threading.Lock()
+_slowest = {}
+
+
+def explain(context, sql, params):
+    """Return the database's plan for a SELECT, one line per step"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return []
+    connection = context['connection']
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    # a cursor straight from the backend, so this statement isn't timed itself
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception as ex:  # pylint: disable=broad-except
+        return [f'EXPLAIN failed: {ex}']
+    finally:
+        cursor.close()
+
+
+def remember(shape, elapsed_ms, sql, params, where, plan):
+    """Keep the statement if it is among the slowest shapes seen"""
+    top = getattr(settings, 'SLOW_QUERY_TOP', DEFAULT_SLOW_QUERY_TOP)
+    with _lock:
+        entry = _slowest.get(shape)
+        if entry is None:
+            entry = _slowest[shape] = {'shape': shape, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        if elapsed_ms >= entry['max_ms']:
+            entry.update(max_ms=elapsed_ms, sql=sql, params=[str(p) for p in params or []],
+                         caller=where, plan=plan)
+        if len(_slowest) > top:
+            fastest = min(_slowest.values(), key=lambda e: e['max_ms'])
+            del _slowest[fastest['shape']]
+
+
+def slowest_queries():
+    """Return the kept statement shapes, slowest first"""
+    with _lock:
+        entries = [dict(entry) for entry in _slowest.values()]
+    return sorted(entries, key=lambda e: e['max_ms'], reverse=True)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper that logs the statement when it is slow"""
+    threshold = getattr(settings, 'SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if threshold is not None and elapsed_ms >= threshold and not many:
+            where = caller()
+            plan = explain(context, sql, params)
+            logger.warning('Slow query (%.1f ms) from %s: %s %r\n  plan: %s',
+                           elapsed_ms, where, sql, params, '\n        '.join(plan))
+            remember(fingerprint(sql), elapsed_ms, sql, params, where, plan)
+
+
+class SlowQueryMiddleware:
+    """Time the statements of every request, see the module docstring"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with timing_queries():
+            response = self.get_response(request)
+        # a streamed body runs its queries while it is sent, after this returns
+        if is_streaming(response):
+            run_within(response, timing_queries)
+        return response
+
+
+@contextlib.contextmanager
+def timing_queries():
+    """Time the statements run on every database inside the block"""
+    with contextlib.ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(time_query))
+        yield
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def slow_query_stats(request):
+    '''Reports the slowest statement shapes seen since the server started
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    return Response(slowest_queries())
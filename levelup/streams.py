@@ -0,0 +1,46 @@
+"""Keep a middleware's hold on a request until its streamed body is sent
+
+A StreamingHttpResponse leaves the middleware before its body is made: the
+server reads 'streaming_content' afterwards, and that is when the queries of
+e.g. the NDJSON listings and the .ics feed run. A middleware that sets
+something up around get_response() uses these helpers to keep it in place
+for the body as well.
+"""
+import threading
+
+
+def is_streaming(response):
+    return getattr(response, 'streaming', False)
+
+
+def run_within(response, make_context):
+    """Make the rest of the response's body inside the context 'make_context()' returns"""
+    response.streaming_content = _within(make_context, response.streaming_content)
+
+
+def _within(make_context, content):
+    with make_context():
+        yield from content
+
+
+def on_close(response, callback):
+    """Call 'callback' once, when the server closes the response
+
+    Servers close every response once it is sent, or when the client went
+    away, even if the body was never read.
+    """
+    close = response.close
+    lock = threading.Lock()
+    called = False
+
+    def close_and_call():
+        nonlocal called
+        try:
+            close()
+        finally:
+            with lock:
+                first, called = not called, True
+            if first:
+                callback()
+
+    response.close = close_and_call
@@ -17,8 +17,11 @@ from django.contrib import admin
 from django.conf.urls import include
 from django.urls import path
 from levelupapi.views import register_user, login_user, GameTypeView
-from levelupapi.views import GameView, EventView
+from levelupapi.views import GameView, EventView, GamerView, ChangeView, LeaderboardView
+from levelupapi.views import calendar_feed
 from rest_framework import routers
+from levelup.admission import admission_stats
+from levelup.slowqueries import slow_query_stats
 
         # "trailing_slash=False" tells router to accept '/gametypes' instead of '/gametypes/'
         # it prevents errors where the fetch is missing the slash at the end fo the URL
@@ -33,11 +36,17 @@ router = routers.DefaultRouter(trailing_slash=False)
 router.register(r'gametypes', GameTypeView, 'gametype')
 router.register(r'events', EventView, 'event')
 router.register(r'games', GameView, 'game')
+router.register(r'gamers', GamerView, 'gamer')
+router.register(r'changes', ChangeView, 'change')
+router.register(r'leaderboard', LeaderboardView, 'leaderboard')
 
 urlpatterns = [
     path('register', register_user),
     path('login', login_user),
+    path('calendar/<str:feed_token>.ics', calendar_feed),
     path('admin/', admin.site.urls),
+    path('stats/admission', admission_stats),
+    path('stats/slowqueries', slow_query_stats),
     path('', include(router.urls)),
     path('', include('levelupreports.urls')),
 ]
@@ -1,3 +1,11 @@
 from django.contrib import admin
+from levelupapi.models import Task
 
 # Register your models here.
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Shows what is waiting in, running from, or failed in the task queue"""
+    list_display = ('id', 'name', 'status', 'attempts', 'run_after', 'created_on')
+    list_filter = ('status',)
+    readonly_fields = ('last_error',)
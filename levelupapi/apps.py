@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LevelupapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'levelupapi'
+
+    def ready(self):
+        # importing the module connects the handlers that fill the Change log
+        from levelupapi import signals  # pylint: disable=unused-import,import-outside-toplevel
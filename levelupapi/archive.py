@@ -0,0 +1,58 @@
+"""Moves past events and their signups to the archive tables
+
+Nobody looks at last year's game nights, yet every /events query had to
+step over them. `manage.py archive_events --before DATE` moves them into
+ArchivedEvent and ArchivedEventGamer, one batch per transaction, so the
+Event table and its indexes only hold current events. /events shows the
+archived ones too when asked with "?include_archived=true".
+
+Clients following /changes see an archived event as deleted, and its
+detail cache entry is dropped. The leaderboards and the gamer profiles
+still count it. Recurring events stay, since their series may still be
+running.
+"""
+from django.db import connections, transaction
+from levelupapi import cascade, detail_cache, list_cache, report_versions
+from levelupapi.models import ArchivedEvent, ArchivedEventGamer, Event, EventGamer
+
+# how many events are moved in one transaction
+BATCH_SIZE = 500
+
+EVENT_COLUMNS = ('id', 'game_id', 'description', 'date', 'time', 'starts_at', 'organizer_id')
+SIGNUP_COLUMNS = ('gamer_id', 'event_id')
+
+
+def archive_events(before, batch_size=BATCH_SIZE):
+    """Move the events starting before the datetime 'before', oldest first
+
+    Yields how many events each batch moved.
+    """
+    while True:
+        with transaction.atomic():
+            ids = list(Event.objects.filter(starts_at__lt=before, recurrence__isnull=True)
+                       .order_by('starts_at', 'id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return
+            events = Event.objects.filter(id__in=ids)
+            signups = EventGamer.objects.filter(event_id__in=ids)
+            copy_rows(events, ArchivedEvent, EVENT_COLUMNS)
+            copy_rows(signups, ArchivedEventGamer, SIGNUP_COLUMNS)
+            cascade.log_deletes('event', events)
+            report_versions.bump(events.values('organizer_id'))
+            cascade.raw_delete(signups)
+            cascade.raw_delete(events)
+        detail_cache.invalidate('event', *ids)
+        list_cache.bump()
+        yield len(ids)
+
+
+def copy_rows(queryset, model, columns):
+    """Copy 'columns' of the rows of 'queryset' into 'model', with one INSERT ... SELECT"""
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().values(*columns).query.sql_with_params()
+    names = ', '.join(connection.ops.quote_name(column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {model._meta.db_table} ({names}) SELECT {names} FROM ({sql}) AS copied',
+            params
+        )
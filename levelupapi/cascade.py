@@ -0,0 +1,101 @@
+"""Delete games and events, and the rows that depend on them, with set-based SQL
+
+Model.delete() has Django's collector load every dependent Event and
+EventGamer into memory and delete them one batch of ids at a time, so that
+it can send signals for each of them. For a game with years of events that
+takes seconds. Here every table is emptied with one DELETE ... WHERE,
+children first, inside one transaction.
+
+Since no signals are sent, the work of the handlers in levelupapi/signals.py
+is done here too, also with set-based statements: the leaderboard counts go
+down, the Change log gets a "delete" per row, the report versions of the
+owners and organizers go up, and the detail cache entries and cached event
+listings are dropped, both right away and again once the transaction has
+committed. Live streams hear about each deleted event once the
+transaction has committed.
+"""
+import itertools
+from django.db import connections, transaction
+from django.utils import timezone
+from levelupapi import detail_cache, leaderboard, list_cache, live, report_versions
+from levelupapi.models import ArchivedEvent, ArchivedEventGamer, Change, Event, EventGamer, Game
+from levelupapi.models import EventRecurrence, OccurrenceException, OccurrenceSignup
+
+# how many ids are read at a time while dropping cache entries
+CHUNK_SIZE = 1000
+
+
+def delete_events(events):
+    """Delete the Event queryset 'events' with their signups and recurrence data
+
+    Returns how many events were deleted.
+    """
+    with transaction.atomic(using=events.db):
+        leaderboard.forget_events(events)
+        log_deletes('event', events)
+        forget_events(events)
+        report_versions.bump(events.values('organizer_id'))
+        for dependent in (EventGamer, EventRecurrence, OccurrenceException, OccurrenceSignup):
+            raw_delete(dependent.objects.filter(event__in=events))
+        list_cache.bump_on_commit(using=events.db)
+        return raw_delete(events)
+
+
+def delete_game(game_id):
+    """Delete a game with all of its events, archived or not, and their signups
+
+    Returns how many games were deleted, 0 when there is no such game.
+    """
+    games = Game.objects.filter(pk=game_id)
+    archived = ArchivedEvent.objects.filter(game_id=game_id)
+    with transaction.atomic():
+        delete_events(Event.objects.filter(game_id=game_id))
+        # archived events were logged as deleted when they were archived
+        leaderboard.forget_events(archived, ArchivedEventGamer)
+        raw_delete(ArchivedEventGamer.objects.filter(event__in=archived))
+        raw_delete(archived)
+        log_deletes('game', games)
+        report_versions.bump(games.values('gamer_id'))
+        detail_cache.invalidate_on_commit('game', game_id)
+        return raw_delete(games)
+
+
+def raw_delete(queryset):
+    """Run a single DELETE for the rows of 'queryset', without loading them"""
+    return queryset._raw_delete(queryset.db)  # pylint: disable=protected-access
+
+
+def log_deletes(model, queryset):
+    """Add a "delete" Change for every row of 'queryset', with one INSERT ... SELECT"""
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Change._meta.db_table} (model, object_id, action, changed_on) '
+            f'SELECT %s, deleted.id, %s, %s FROM ({sql}) AS deleted',
+            (model, Change.DELETE, now, *params)
+        )
+
+
+def forget_events(events):
+    """Drop the cached events, and queue their live "delete" messages
+
+    The ids are read CHUNK_SIZE at a time. They are only kept until the
+    commit while somebody has a live stream open.
+    """
+    publish = live.broker.has_subscribers()
+    rows = events.order_by().values_list('id', 'game_id').iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        detail_cache.invalidate_on_commit('event', *(event_id for event_id, _ in chunk), using=events.db)
+        if publish:
+            transaction.on_commit(lambda chunk=chunk: publish_deletes(chunk), using=events.db)
+
+
+def publish_deletes(rows):
+    """Tell the live streams about deleted (event id, game id) pairs"""
+    for event_id, game_id in rows:
+        live.publish_event('delete', event_id, game_id)
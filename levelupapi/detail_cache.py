@@ -0,0 +1,57 @@
+"""Cache-aside store for the serialized game and event detail responses
+
+GameView.retrieve and EventView.retrieve look here first and only query and
+serialize on a miss. The signal handlers in levelupapi/signals.py delete an
+entry whenever something it shows changes: the object itself, and for games
+the GameType, Gamer and User that "depth = 2" nests into the response.
+EventView.signup and leave delete the event's entry, since they change its
+attendees without saving the event.
+
+Like the event listings, entries are only cached when the default backend
+is shared by all server processes (see levelupapi/shared_cache.py): a
+delete in one worker's local memory would leave the others serving the old
+response until TIMEOUT.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from levelupapi import shared_cache
+
+# seconds an entry is kept, an upper bound on how stale a missed delete can be
+TIMEOUT = 600
+
+# bump when a serializer's fields change, so old entries are never read
+VERSION = 1
+
+
+def key(model, pk):
+    return f'detail:{VERSION}:{model}:{pk}'
+
+
+def get_or_build(model, pk, build):
+    """Return the cached representation of 'model' 'pk', calling 'build' on a miss
+
+    'build' returns the serialized data and may raise DoesNotExist, in which
+    case nothing is cached.
+    """
+    if not shared_cache.is_shared():
+        return dict(build())
+    data = cache.get(key(model, pk))
+    if data is None:
+        data = dict(build())
+        cache.set(key(model, pk), data, TIMEOUT)
+    return data
+
+
+def invalidate(model, *pks):
+    """Forget the cached representations of the given objects"""
+    cache.delete_many([key(model, pk) for pk in pks])
+
+
+def invalidate_on_commit(model, *pks, using=None):
+    """Forget the cached representations now, and again once the transaction commits
+
+    Until the transaction commits a retrieve still reads the old row and
+    could cache it again; the second round after the commit drops that.
+    """
+    invalidate(model, *pks)
+    transaction.on_commit(lambda: invalidate(model, *pks), using=using)
@@ -0,0 +1,80 @@
+"""Keeps the GamerStats counters behind the leaderboards up to date
+
+Every change is a single UPDATE with an F() expression, so two requests
+changing the same gamer's counts at once can't overwrite each other.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from levelupapi.models import ArchivedEvent, ArchivedEventGamer, Event, EventGamer, Gamer, GamerStats
+
+ORGANIZED = 'events_organized'
+JOINED = 'events_joined'
+
+
+def bump(field, delta, gamer_id=None, user_id=None):
+    """Add 'delta' to the 'field' counter of a gamer, given by gamer or user id
+
+    A gamer without a stats row yet gets one.
+    """
+    if gamer_id is not None:
+        stats = GamerStats.objects.filter(gamer_id=gamer_id)
+    else:
+        stats = GamerStats.objects.filter(gamer__user_id=user_id)
+    if stats.update(**{field: F(field) + delta}):
+        return
+
+    if gamer_id is None:
+        gamer_id = Gamer.objects.filter(user_id=user_id).values_list('id', flat=True).first()
+    if gamer_id is not None:
+        GamerStats.objects.get_or_create(gamer_id=gamer_id)
+        GamerStats.objects.filter(gamer_id=gamer_id).update(**{field: F(field) + delta})
+
+
+def forget_events(events, signups=EventGamer):
+    """Take the Event queryset 'events' out of the counts, before deleting them
+
+    Works for one event as well as for every event of a game: each gamer's
+    counters go down by how many of the events they organized or joined.
+    For an ArchivedEvent queryset pass ArchivedEventGamer as 'signups'.
+    """
+    organized = (events.filter(organizer=OuterRef('gamer'))
+                 .order_by().values('organizer').annotate(count=Count('id')).values('count'))
+    joined = (signups.objects.filter(event__in=events, gamer=OuterRef('gamer'))
+              .order_by().values('gamer').annotate(count=Count('id')).values('count'))
+
+    GamerStats.objects.filter(gamer__in=events.values('organizer')).update(
+        events_organized=F('events_organized') - Coalesce(Subquery(organized), 0))
+    GamerStats.objects.filter(gamer__in=signups.objects.filter(event__in=events).values('gamer')).update(
+        events_joined=F('events_joined') - Coalesce(Subquery(joined), 0))
+
+
+def rebuild():
+    """Recount every gamer's stats from the event and signup tables
+
+    Archived events still count, archiving doesn't change the leaderboards.
+    """
+    def count(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(count=Count('id')).values('count')), 0)
+
+    counts = Gamer.objects.annotate(
+        organized=count(Event, 'organizer') + count(ArchivedEvent, 'organizer'),
+        joined=count(EventGamer, 'gamer') + count(ArchivedEventGamer, 'gamer')
+    ).values_list('id', 'organized', 'joined')
+
+    with transaction.atomic():
+        GamerStats.objects.all().delete()
+        GamerStats.objects.bulk_create(
+            [GamerStats(gamer_id=gamer_id, events_organized=organized, events_joined=joined)
+             for gamer_id, organized, joined in counts.iterator()],
+            batch_size=500
+        )
+
+
+def top(field, limit):
+    """Return the 'limit' GamerStats with the highest 'field', with their names"""
+    return (GamerStats.objects.select_related('gamer__user')
+            .filter(**{f'{field}__gt': 0})
+            .order_by(f'-{field}', 'gamer')[:limit])
@@ -0,0 +1,101 @@
+"""Shared cache of the /events listing, and each gamer's set of joined events
+
+Two gamers asking for the same /events page get the same events; only the
+'joined' flag differs. So the serialized listing is cached once for
+everybody, keyed by its query string, and 'joined' is filled in per request
+from a cached set of the gamer's joined event ids.
+
+Every listing is keyed by a version number as well. Anything that changes
+an event or its attendees bumps it (see levelupapi/signals.py, signup and
+leave, and levelupapi/cascade.py), which retires all cached listings at
+once. A gamer's joined set is dropped whenever they sign up or leave.
+
+Nothing is cached unless the cache backend is shared by every server
+process, see levelupapi/shared_cache.py; the listing and joined set are
+then built on every request.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.db import transaction
+from levelupapi import shared_cache
+
+# seconds an entry is kept
+TIMEOUT = 600
+
+# the query string filters that read the same for every gamer; a listing
+# with any other parameter, like "joined" or "upcoming", isn't cached
+SHARED_PARAMS = {'game', 'organizer', 'from', 'to', 'include_archived'}
+
+VERSION_KEY = 'events:list:version'
+
+
+def version():
+    """The current listing version, started at a new value if it was evicted"""
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        # never back to an old number, which could bring back old listings
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        current = cache.get(VERSION_KEY)
+    return current
+
+
+def bump():
+    """Retire every cached listing"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+
+
+def bump_on_commit(*user_ids, using=None):
+    """Retire the cached listings, and the users' joined sets, now and on commit
+
+    Until the transaction commits another request still reads the old rows
+    and could cache them again; the second round after the commit drops those.
+    """
+    def forget():
+        bump()
+        forget_joined(*user_ids)
+    forget()
+    transaction.on_commit(forget, using=using)
+
+
+def is_shared(params):
+    """Whether a listing with these query string parameters can be cached"""
+    return set(params) <= SHARED_PARAMS
+
+
+def listing(params, build):
+    """Return the cached listing for 'params', calling 'build' on a miss"""
+    if not shared_cache.is_shared():
+        return [dict(row) for row in build()]
+    query = urlencode(sorted(params.items()))
+    key = f'events:list:{version()}:{hashlib.md5(query.encode()).hexdigest()}'
+    data = cache.get(key)
+    if data is None:
+        data = [dict(row) for row in build()]
+        cache.set(key, data, TIMEOUT)
+    return data
+
+
+def joined_ids(user_id, build):
+    """Return the cached set of event ids the user's gamer joined, calling 'build' on a miss
+
+    The sets are kept by user id, which the request's token already has,
+    so signup and leave can drop one without looking up the gamer.
+    """
+    if not shared_cache.is_shared():
+        return set(build())
+    key = f'events:joined:{user_id}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(build())
+        cache.set(key, ids, TIMEOUT)
+    return ids
+
+
+def forget_joined(*user_ids):
+    """Drop the joined sets of the given users' gamers"""
+    cache.delete_many([f'events:joined:{user_id}' for user_id in user_ids])
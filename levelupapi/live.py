@@ -0,0 +1,188 @@
+"""Live event notifications streamed to browsers as Server-Sent Events
+
+EventView publishes a message whenever a gamer signs up for or leaves an
+event, and whenever an event is updated or deleted. Every open stream
+subscribes to one topic, either a single event or every event of a game:
+
+    /stream/events/<event_id>?token=<auth token>
+    /stream/games/<game_id>?token=<auth token>
+
+The streams are served by 'sse_application', which levelup/asgi.py mounts in
+front of Django. Each open stream is a coroutine waiting on its own bounded
+queue, so thousands of idle connections don't need a thread each. Publishing
+is in-process only: run a single ASGI worker, or every worker only sees the
+writes it handled itself.
+
+`python manage.py runserver` only speaks WSGI and never reaches this app,
+so run the site under an ASGI server to get the streams:
+
+    pipenv run uvicorn levelup.asgi:application --reload
+
+The streams bypass Django's middleware, CorsMiddleware included, so the
+origins it allows (CORS_ORIGIN_WHITELIST) are allowed here as well.
+"""
+import asyncio
+import json
+import re
+import threading
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from corsheaders.conf import conf as cors_conf
+from rest_framework.authtoken.models import Token
+
+# how many messages may wait for a slow client before it is disconnected
+QUEUE_SIZE = 100
+
+# seconds between keep-alive comments, so proxies don't close idle streams
+KEEPALIVE = 15
+
+STREAM_PATH = re.compile(r'^/stream/(events|games)/(\d+)$')
+
+# put on a queue to tell its stream to finish
+CLOSE = None
+
+
+class Subscriber:
+    """One open stream: a bounded queue that lives on the event loop"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def offer(self, message):
+        """Hand a message over from any thread"""
+        self.loop.call_soon_threadsafe(self.put, message)
+
+    def put(self, message):
+        """Queue a message, or close the stream if the client fell behind
+
+        A full queue means the client isn't reading. Instead of holding more
+        messages for it, its backlog is thrown away and the stream is closed,
+        so the browser reconnects and reloads the event.
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSE)
+
+
+class Broker:
+    """Keeps track of the open streams for each topic and fans messages out"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.topics = {}
+
+    def subscribe(self, topic, subscriber):
+        with self.lock:
+            self.topics.setdefault(topic, set()).add(subscriber)
+
+    def unsubscribe(self, topic, subscriber):
+        with self.lock:
+            subscribers = self.topics.get(topic, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self.topics.pop(topic, None)
+
+    def has_subscribers(self):
+        return bool(self.topics)
+
+    def publish(self, topics, message):
+        with self.lock:
+            subscribers = set().union(*(self.topics.get(topic, ()) for topic in topics))
+        for subscriber in subscribers:
+            subscriber.offer(message)
+
+
+broker = Broker()
+
+
+def publish_event(kind, event_id, game_id, **data):
+    """Tell the streams following an event, or its game, what happened to it
+
+    'kind' is one of "signup", "leave", "update" or "delete".
+    """
+    message = f"event: {kind}\ndata: {json.dumps(dict(event=event_id, game=game_id, **data))}\n\n"
+    broker.publish((f'events:{event_id}', f'games:{game_id}'), message.encode())
+
+
+def token_user_id(key):
+    """Return the id of the user with the auth token 'key', or None"""
+    return Token.objects.filter(key=key).values_list('user_id', flat=True).first()
+
+
+def cors_headers(scope):
+    """The CORS headers for the request's Origin, when settings allow it
+
+    An EventSource opened by the React client on another port is a cross
+    origin request, and the browser drops the stream without them.
+    """
+    origin = dict(scope.get('headers', ())).get(b'origin')
+    if origin is None:
+        return []
+    allowed = cors_conf.CORS_ALLOW_ALL_ORIGINS or origin.decode('latin-1') in cors_conf.CORS_ALLOWED_ORIGINS
+    if not allowed:
+        return [(b'vary', b'origin')]
+    return [(b'access-control-allow-origin', origin), (b'vary', b'origin')]
+
+
+async def sse_application(scope, receive, send):
+    """ASGI application serving the /stream/ URLs"""
+    cors = cors_headers(scope)
+    match = STREAM_PATH.match(scope['path'])
+    if match is None:
+        await send_status(send, 404, cors)
+        return
+
+    # EventSource can't send an Authorization header, so the token comes
+    # in the query string instead
+    query = parse_qs(scope['query_string'].decode())
+    key = query.get('token', [''])[0]
+    if not key or await sync_to_async(token_user_id)(key) is None:
+        await send_status(send, 401, cors)
+        return
+
+    topic = f'{match[1]}:{match[2]}'
+    subscriber = Subscriber(asyncio.get_running_loop())
+    broker.subscribe(topic, subscriber)
+    watcher = asyncio.ensure_future(wait_for_disconnect(receive, subscriber))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                message = b': keepalive\n\n'
+            if message is CLOSE:
+                break
+            await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        broker.unsubscribe(topic, subscriber)
+        watcher.cancel()
+
+
+async def wait_for_disconnect(receive, subscriber):
+    """Close the stream once the client goes away"""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscriber.close()
+
+
+async def send_status(send, status, headers=()):
+    await send({'type': 'http.response.start', 'status': status, 'headers': list(headers)})
+    await send({'type': 'http.response.body', 'body': b''})
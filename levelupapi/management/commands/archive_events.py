@@ -0,0 +1,31 @@
+"""Management command that moves past events to the archive tables"""
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import dateparse, timezone
+from levelupapi.archive import BATCH_SIZE, archive_events
+
+
+class Command(BaseCommand):
+    help = 'Move events that started before a date, with their signups, to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True,
+                            help='Archive events starting before this date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='How many events to move in one transaction')
+
+    def handle(self, *args, **options):
+        try:
+            day = dateparse.parse_date(options['before'])
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f'"{options["before"]}" is not a valid date')
+        before = timezone.make_aware(datetime.datetime.combine(day, datetime.time()),
+                                     datetime.timezone.utc)
+
+        total = 0
+        for moved in archive_events(before, options['batch_size']):
+            total += moved
+            self.stdout.write(f'Archived {moved} event(s)')
+        self.stdout.write(f'Archived {total} event(s) in all')
@@ -0,0 +1,12 @@
+"""Management command that recounts the leaderboard stats from scratch"""
+from django.core.management.base import BaseCommand
+from levelupapi import leaderboard
+from levelupapi.models import GamerStats
+
+
+class Command(BaseCommand):
+    help = 'Recount every gamer\'s organized and joined events for the leaderboards'
+
+    def handle(self, *args, **options):
+        leaderboard.rebuild()
+        self.stdout.write(f'Rebuilt stats for {GamerStats.objects.count()} gamer(s)')
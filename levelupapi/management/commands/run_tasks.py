@@ -0,0 +1,35 @@
+"""Management command that works through the background task queue"""
+import time
+from django.core.management.base import BaseCommand
+from levelupapi.tasks import queue_depth, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks, polling for new ones until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run the tasks that are due now, then exit')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--status', action='store_true',
+                            help='Print how many tasks there are of each status, then exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            for status, count in sorted(queue_depth().items()):
+                self.stdout.write(f'{status}: {count}')
+            return
+
+        if options['once']:
+            count = run_pending()
+            self.stdout.write(f'Ran {count} task(s)')
+            return
+
+        self.stdout.write('Waiting for tasks, press CTRL-C to stop')
+        try:
+            while True:
+                if not run_pending(limit=100):
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.4 on 2022-06-06 14:12
+
+import datetime
+from django.db import migrations, models
+
+
+def fill_starts_at(apps, schema_editor):
+    """Copy the existing 'date' and 'time' of every event into 'starts_at'"""
+    Event = apps.get_model('levelupapi', 'Event')
+    for event in Event.objects.all().only('id', 'date', 'time'):
+        starts_at = datetime.datetime.combine(event.date, event.time)
+        event.starts_at = starts_at.replace(tzinfo=datetime.timezone.utc)
+        event.save(update_fields=['starts_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_starts_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['game', 'starts_at'], name='event_game_starts_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organizer', 'starts_at'], name='event_organizer_starts_at_idx'),
+        ),
+    ]
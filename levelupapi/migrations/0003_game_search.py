@@ -0,0 +1,72 @@
+# Generated by Django 4.0.4 on 2022-06-07 10:31
+
+from django.db import migrations
+
+
+# An FTS5 "external content" table indexes the title and maker of every
+# game without storing a second copy of them. The triggers keep the index in
+# step with levelupapi_game on every insert, update and delete.
+CREATE_SEARCH_TABLE = [
+    """
+    CREATE VIRTUAL TABLE levelupapi_game_fts USING fts5(
+        title, maker, content='levelupapi_game', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_fts_insert AFTER INSERT ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_fts(rowid, title, maker)
+        VALUES (new.id, new.title, new.maker);
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_fts_delete AFTER DELETE ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_fts(levelupapi_game_fts, rowid, title, maker)
+        VALUES ('delete', old.id, old.title, old.maker);
+    END
+    """,
+    """
+    CREATE TRIGGER levelupapi_game_fts_update AFTER UPDATE ON levelupapi_game BEGIN
+        INSERT INTO levelupapi_game_fts(levelupapi_game_fts, rowid, title, maker)
+        VALUES ('delete', old.id, old.title, old.maker);
+        INSERT INTO levelupapi_game_fts(rowid, title, maker)
+        VALUES (new.id, new.title, new.maker);
+    END
+    """,
+    """
+    INSERT INTO levelupapi_game_fts(levelupapi_game_fts) VALUES ('rebuild')
+    """,
+]
+
+DROP_SEARCH_TABLE = [
+    "DROP TRIGGER IF EXISTS levelupapi_game_fts_insert",
+    "DROP TRIGGER IF EXISTS levelupapi_game_fts_delete",
+    "DROP TRIGGER IF EXISTS levelupapi_game_fts_update",
+    "DROP TABLE IF EXISTS levelupapi_game_fts",
+]
+
+
+def run_on_sqlite(statements):
+    """Build a RunPython function that only runs the SQL on SQLite
+
+    Other databases have no FTS5, so GameView falls back to a LIKE search there.
+    """
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0002_event_starts_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SEARCH_TABLE),
+            run_on_sqlite(DROP_SEARCH_TABLE),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.4 on 2022-06-08 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0003_game_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventgamer',
+            index=models.Index(fields=['gamer', 'event'], name='eventgamer_gamer_event_idx'),
+        ),
+    ]
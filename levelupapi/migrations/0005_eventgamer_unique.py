@@ -0,0 +1,33 @@
+# Generated by Django 4.0.4 on 2022-06-09 13:47
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_signups(apps, schema_editor):
+    """Keep only the first row of every (gamer, event) pair"""
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+    keep = (EventGamer.objects
+            .values('gamer_id', 'event_id')
+            .annotate(first_id=Min('id'))
+            .values('first_id'))
+    EventGamer.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0004_eventgamer_gamer_event_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_signups, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='eventgamer',
+            name='eventgamer_gamer_event_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='eventgamer',
+            constraint=models.UniqueConstraint(fields=('gamer', 'event'), name='eventgamer_gamer_event_unique'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.4 on 2022-06-15 10:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_events(apps, schema_editor):
+    """Fill in the stats of every gamer from the events already stored"""
+    Gamer = apps.get_model('levelupapi', 'Gamer')
+    GamerStats = apps.get_model('levelupapi', 'GamerStats')
+    gamers = Gamer.objects.annotate(
+        organized=Count('event', distinct=True),
+        joined=Count('eventgamer', distinct=True)
+    ).values_list('id', 'organized', 'joined')
+    GamerStats.objects.bulk_create(
+        [GamerStats(gamer_id=gamer_id, events_organized=organized, events_joined=joined)
+         for gamer_id, organized, joined in gamers.iterator()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0007_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GamerStats',
+            fields=[
+                ('gamer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='levelupapi.gamer')),
+                ('events_organized', models.IntegerField(default=0)),
+                ('events_joined', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-events_organized', 'gamer'], name='stats_organized_idx'), models.Index(fields=['-events_joined', 'gamer'], name='stats_joined_idx')],
+            },
+        ),
+        migrations.RunPython(count_existing_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.0.4 on 2022-06-16 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0008_gamerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamer',
+            name='feed_token',
+            field=models.CharField(blank=True, max_length=40, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'id'], name='change_model_id_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.0.4 on 2022-06-17 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0009_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('description', models.CharField(max_length=40)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('starts_at', models.DateTimeField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='levelupapi.game')),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='levelupapi.gamer')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedEventGamer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='levelupapi.archivedevent')),
+                ('gamer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='levelupapi.gamer')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedevent',
+            name='attendees',
+            field=models.ManyToManyField(related_name='archived_events', through='levelupapi.ArchivedEventGamer', to='levelupapi.gamer'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedeventgamer',
+            constraint=models.UniqueConstraint(fields=('gamer', 'event'), name='archived_gamer_event_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['starts_at'], name='archived_starts_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['game', 'starts_at'], name='archived_game_starts_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['organizer', 'starts_at'], name='archived_organizer_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.4 on 2022-06-22 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0011_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportVersion',
+            fields=[
+                ('gamer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='report_version', serialize=False, to='levelupapi.gamer')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
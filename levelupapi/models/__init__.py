@@ -2,4 +2,10 @@ from .gamer import Gamer
 from .game import Game
 from .event import Event
 from .gametype import GameType
-from .event_gamer import EventGamer
\ No newline at end of file
+from .event_gamer import EventGamer
+from .change import Change
+from .task import Task
+from .gamer_stats import GamerStats
+from .archived_event import ArchivedEvent, ArchivedEventGamer
+from .recurrence import EventRecurrence, OccurrenceException, OccurrenceSignup
+from .report_version import ReportVersion
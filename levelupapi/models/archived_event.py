@@ -0,0 +1,36 @@
+from django.db import models
+
+class ArchivedEvent(models.Model):
+    """A past event moved out of the Event table by `manage.py archive_events`
+
+    It keeps the id it had as an Event, so links to it stay the same and
+    the two tables never hand out the same id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    game = models.ForeignKey("Game", on_delete=models.CASCADE)
+    description = models.CharField(max_length=40)
+    date = models.DateField()
+    time = models.TimeField()
+    starts_at = models.DateTimeField()
+    organizer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
+    attendees = models.ManyToManyField("Gamer", through="ArchivedEventGamer", related_name="archived_events")
+
+    # the same indexes as Event, for "?include_archived=true" on /events
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['starts_at'], name='archived_starts_at_idx'),
+            models.Index(fields=['game', 'starts_at'], name='archived_game_starts_at_idx'),
+            models.Index(fields=['organizer', 'starts_at'], name='archived_organizer_idx'),
+        ]
+
+
+class ArchivedEventGamer(models.Model):
+    """A signup for an ArchivedEvent, moved along with it"""
+    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
+    event = models.ForeignKey("ArchivedEvent", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gamer', 'event'], name='archived_gamer_event_unique'),
+        ]
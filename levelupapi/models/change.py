@@ -0,0 +1,25 @@
+from django.db import models
+
+class Change(models.Model):
+    """One entry in the append-only log of changes to events and games
+
+    The id doubles as the sequence number clients poll /changes with. Rows are
+    only ever added, so the ids only ever go up.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = [(CREATE, 'Create'), (UPDATE, 'Update'), (DELETE, 'Delete')]
+
+    model = models.CharField(max_length=10)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTIONS)
+    changed_on = models.DateTimeField(auto_now_add=True)
+
+    # the calendar feeds ask for the newest change to an event, which this
+    # index answers without walking the log
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'id'], name='change_model_id_idx'),
+        ]
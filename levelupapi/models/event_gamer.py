@@ -2,4 +2,14 @@ from django.db import models
 
 class EventGamer(models.Model):
     gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
-    event = models.ForeignKey("Event", on_delete=models.CASCADE)
\ No newline at end of file
+    event = models.ForeignKey("Event", on_delete=models.CASCADE)
+
+    # a gamer can only sign up for an event once. The unique (gamer, event)
+    # index behind the constraint also lets "which events has this gamer
+    # joined?" be answered from the index alone, without touching the rows,
+    # and lets signup insert with "ON CONFLICT DO NOTHING".
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gamer', 'event'], name='eventgamer_gamer_event_unique'),
+        ]
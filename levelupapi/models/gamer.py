@@ -4,4 +4,5 @@ from django.contrib.auth.models import User
 class Gamer(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.CharField(max_length=60)
-    
\ No newline at end of file
+    # secret part of the gamer's calendar feed URL, made on first use
+    feed_token = models.CharField(max_length=40, unique=True, null=True, blank=True)
@@ -0,0 +1,21 @@
+from django.db import models
+
+class GamerStats(models.Model):
+    """Running counts behind the leaderboards, one row per gamer
+
+    EventView keeps these up to date as events are created and deleted and
+    gamers sign up or leave; `python manage.py rebuild_leaderboard` recounts
+    them from scratch. See levelupapi/leaderboard.py.
+    """
+    gamer = models.OneToOneField("Gamer", on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    events_organized = models.IntegerField(default=0)
+    events_joined = models.IntegerField(default=0)
+
+    # the leaderboards read the first rows of these indexes, so the top N
+    # costs the same however many gamers there are
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-events_organized', 'gamer'], name='stats_organized_idx'),
+            models.Index(fields=['-events_joined', 'gamer'], name='stats_joined_idx'),
+        ]
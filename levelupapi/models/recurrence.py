@@ -0,0 +1,46 @@
+from django.db import models
+
+class EventRecurrence(models.Model):
+    """The rule that repeats an event, e.g. every 2 weeks until the end of June
+
+    The event's own date and time are the first occurrence. The rest are
+    never stored, see levelupapi/recurrence.py.
+    """
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    MONTHLY = 'monthly'
+    FREQUENCIES = [(DAILY, 'Daily'), (WEEKLY, 'Weekly'), (MONTHLY, 'Monthly')]
+
+    event = models.OneToOneField("Event", on_delete=models.CASCADE, primary_key=True, related_name="recurrence")
+    frequency = models.CharField(max_length=7, choices=FREQUENCIES)
+    interval = models.PositiveIntegerField(default=1)
+    until = models.DateField(null=True, blank=True)
+
+
+class OccurrenceException(models.Model):
+    """One occurrence of a recurring event that was cancelled or moved
+
+    'date' is the day the rule puts the occurrence on, 'starts_at' where it
+    was moved to.
+    """
+    event = models.ForeignKey("Event", on_delete=models.CASCADE)
+    date = models.DateField()
+    cancelled = models.BooleanField(default=False)
+    starts_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'date'], name='exception_event_date_unique'),
+        ]
+
+
+class OccurrenceSignup(models.Model):
+    """A gamer signed up for one occurrence of a recurring event"""
+    event = models.ForeignKey("Event", on_delete=models.CASCADE)
+    date = models.DateField()
+    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'date', 'gamer'], name='occurrence_signup_unique'),
+        ]
@@ -0,0 +1,11 @@
+from django.db import models
+
+class ReportVersion(models.Model):
+    """How often a gamer's blocks in the HTML reports changed, one row per gamer
+
+    The reports cache every gamer's block under this number, so a block is
+    only built again after the gamer's games, events or name changed. A
+    gamer without a row is at version 0. See levelupapi/report_versions.py.
+    """
+    gamer = models.OneToOneField("Gamer", on_delete=models.CASCADE, primary_key=True, related_name="report_version")
+    version = models.PositiveIntegerField(default=0)
@@ -0,0 +1,158 @@
+"""Expands recurring events into their occurrences, only for the days asked for
+
+A weekly game night is one Event row with an EventRecurrence rule, instead
+of a row per week. 'occurrences' is a generator that jumps straight to the
+start of the requested window and stops at its end, so its cost follows the
+size of the window, not the age of the series. Cancelled and moved
+occurrences are OccurrenceException rows, and signups for a single
+occurrence are OccurrenceSignup rows; both are only read for the window.
+/events expands every series in its date window at once with 'expand'.
+
+An occurrence is known by its 'date': the day the rule puts it on, in UTC,
+even after it was moved to another day.
+"""
+import collections
+import datetime
+from levelupapi.models import EventGamer, EventRecurrence, OccurrenceException, OccurrenceSignup
+
+# how far ahead /events/<id>/occurrences, and /events for recurring events,
+# look when no "to" is given
+DEFAULT_WINDOW = datetime.timedelta(days=31)
+
+# the longest window one request may expand
+MAX_WINDOW = datetime.timedelta(days=366)
+
+Occurrence = collections.namedtuple('Occurrence', 'date starts_at')
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def rule_of(event):
+    """Return the event's EventRecurrence, or None for a one-off event"""
+    try:
+        return event.recurrence
+    except EventRecurrence.DoesNotExist:
+        return None
+
+
+def slots(event, start, end):
+    """Yield the datetimes the event's rule puts an occurrence on in [start, end)"""
+    rule = rule_of(event)
+    if rule is None:
+        if start <= event.starts_at < end:
+            yield event.starts_at
+        return
+
+    if rule.frequency == EventRecurrence.MONTHLY:
+        steps = monthly(event.starts_at, rule.interval, start)
+    else:
+        days = rule.interval * (7 if rule.frequency == EventRecurrence.WEEKLY else 1)
+        steps = fixed(event.starts_at, datetime.timedelta(days=days), start)
+    for starts_at in steps:
+        if starts_at >= end or (rule.until is not None and starts_at.date() > rule.until):
+            return
+        if starts_at >= start:
+            yield starts_at
+
+
+def fixed(first, step, start):
+    """Yield 'first' plus whole 'step's forever, starting at the first one from 'start'"""
+    current = first + max(0, -((first - start) // step)) * step
+    while True:
+        yield current
+        current += step
+
+
+def monthly(first, interval, start):
+    """Yield 'first' every 'interval' months forever, from the month of 'start' on
+
+    Months without that day, like a 31st in April, are skipped.
+    """
+    months = (start.year - first.year) * 12 + start.month - first.month
+    step = max(0, months // interval)
+    while True:
+        month = first.month - 1 + step * interval
+        try:
+            yield first.replace(year=first.year + month // 12, month=month % 12 + 1)
+        except ValueError:
+            pass
+        step += 1
+
+
+def occurrences(event, start, end):
+    """Yield the Occurrences of 'event' whose rule date falls in [start, end)
+
+    Cancelled occurrences are left out and moved ones carry their new start.
+    """
+    exceptions = {
+        exception.date: exception
+        for exception in OccurrenceException.objects.filter(
+            event=event, date__gte=start.date(), date__lte=end.date())
+    }
+    return with_exceptions(slots(event, start, end), exceptions)
+
+
+def with_exceptions(starts, exceptions):
+    """Yield an Occurrence for each rule datetime in 'starts', given {date: OccurrenceException}"""
+    for starts_at in starts:
+        exception = exceptions.get(starts_at.date())
+        if exception is None:
+            yield Occurrence(starts_at.date(), starts_at)
+        elif not exception.cancelled:
+            yield Occurrence(starts_at.date(), exception.starts_at or starts_at)
+
+
+def expand(events, start, end):
+    """Yield (event, Occurrence, attendee ids) for every occurrence of 'events' in [start, end)
+
+    'events' are recurring events with their 'recurrence' selected. Their
+    exceptions, signups and occurrence signups in the window are read with
+    one query each, however many series there are.
+    """
+    events = list(events)
+    ids = [event.id for event in events]
+    days = {'date__gte': start.date(), 'date__lte': end.date()}
+    exceptions = collections.defaultdict(dict)
+    for exception in OccurrenceException.objects.filter(event_id__in=ids, **days):
+        exceptions[exception.event_id][exception.date] = exception
+    regulars = collections.defaultdict(set)
+    for event_id, gamer_id in EventGamer.objects.filter(event_id__in=ids).values_list('event_id', 'gamer_id'):
+        regulars[event_id].add(gamer_id)
+    extras = collections.defaultdict(set)
+    for event_id, day, gamer_id in OccurrenceSignup.objects.filter(event_id__in=ids, **days) \
+            .values_list('event_id', 'date', 'gamer_id'):
+        extras[event_id, day].add(gamer_id)
+
+    for event in events:
+        for occurrence in with_exceptions(slots(event, start, end), exceptions[event.id]):
+            yield event, occurrence, sorted(regulars[event.id] | extras[event.id, occurrence.date])
+
+
+def day_window(day):
+    """The [start, end) datetimes of a UTC day"""
+    start = datetime.datetime.combine(day, datetime.time(), tzinfo=datetime.timezone.utc)
+    return start, start + ONE_DAY
+
+
+def is_slot(event, day):
+    """Whether the event's rule puts an occurrence on 'day', cancelled or not"""
+    return next(slots(event, *day_window(day)), None) is not None
+
+
+def find_occurrence(event, day):
+    """Return the Occurrence of 'event' on 'day', or None when there is none"""
+    return next(occurrences(event, *day_window(day)), None)
+
+
+def attendees(event, days):
+    """Return the gamer ids attending each of the occurrences on 'days'
+
+    Gamers signed up for the event itself come to every occurrence; the
+    OccurrenceSignups add gamers to just one.
+    """
+    regulars = list(EventGamer.objects.filter(event=event).values_list('gamer_id', flat=True))
+    result = {day: set(regulars) for day in days}
+    for day, gamer_id in OccurrenceSignup.objects.filter(event=event, date__in=days) \
+            .values_list('date', 'gamer_id'):
+        result[day].add(gamer_id)
+    return {day: sorted(gamer_ids) for day, gamer_ids in result.items()}
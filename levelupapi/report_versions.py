@@ -0,0 +1,33 @@
+"""Bumps the per-gamer ReportVersion numbers the HTML reports cache their blocks under
+
+The games report shows each gamer's name and game titles, the events report
+their name and the descriptions of the events they organize. The handlers in
+levelupapi/signals.py bump a gamer's number when any of those is saved or
+deleted, and levelupapi/cascade.py and levelupapi/archive.py do the same for
+the rows they delete without signals.
+"""
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router
+from levelupapi.models import Gamer, ReportVersion
+
+
+def bump(gamer_ids):
+    """Add one to the report version of every gamer in 'gamer_ids'
+
+    'gamer_ids' is a list of ids or a values() queryset of them. It is a
+    single INSERT ... ON CONFLICT, which also makes the missing rows.
+    """
+    alias = router.db_for_write(ReportVersion)
+    gamers = Gamer.objects.using(alias).filter(id__in=gamer_ids).order_by().values('id')
+    try:
+        sql, params = gamers.query.sql_with_params()
+    except EmptyResultSet:
+        return
+    table = ReportVersion._meta.db_table
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (gamer_id, version) '
+            f'SELECT bumped.id, 1 FROM ({sql}) AS bumped WHERE true '
+            f'ON CONFLICT (gamer_id) DO UPDATE SET version = {table}.version + 1',
+            params
+        )
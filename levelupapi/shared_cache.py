@@ -0,0 +1,21 @@
+"""Tells whether the default cache is one every server process shares
+
+The event listing cache is retired by bumping a version key, and detail
+responses by deleting their entry. With a process-local backend like
+LocMemCache only the process that handled the change sees that, and every
+other worker keeps serving its old copies until they expire. So those
+caches are only used with a shared
+backend: Redis, Memcached, the database or files. The CACHE_IS_SHARED
+setting overrides the check, e.g. for a single process server or the tests.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared():
+    setting = getattr(settings, 'CACHE_IS_SHARED', None)
+    if setting is not None:
+        return setting
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
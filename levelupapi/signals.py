@@ -0,0 +1,128 @@
+"""Signal handlers that write to the Change log and keep the caches fresh"""
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from levelupapi import detail_cache, list_cache, report_versions
+from levelupapi.models import Change, Event, Game, Gamer, GameType
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Game)
+def record_save(sender, instance, created, raw, **kwargs):
+    """Log a create or update of an event or game"""
+    # fixtures are loaded with raw=True; they are not changes made by a client
+    if raw:
+        return
+    Change.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        action=Change.CREATE if created else Change.UPDATE
+    )
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Game)
+def record_delete(sender, instance, **kwargs):
+    """Log a delete of an event or game, including ones removed by a cascade"""
+    Change.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        action=Change.DELETE
+    )
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def forget_event_detail(sender, instance, **kwargs):
+    """Drop the cached detail response of a changed event, now and on commit"""
+    detail_cache.invalidate_on_commit('event', instance.pk, using=kwargs['using'])
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def forget_game_detail(sender, instance, **kwargs):
+    """Drop the cached detail response of a changed game, now and on commit"""
+    detail_cache.invalidate_on_commit('game', instance.pk, using=kwargs['using'])
+
+
+# A game's detail response nests its game type and its gamer's user, so a
+# change to any of those drops the cached responses of the games showing it.
+
+@receiver(post_save, sender=GameType)
+def forget_game_type_games(sender, instance, **kwargs):
+    """Drop the cached games of a changed game type"""
+    detail_cache.invalidate('game', *Game.objects.filter(game_type=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Gamer)
+def forget_gamer_games(sender, instance, **kwargs):
+    """Drop the cached games of a changed gamer"""
+    detail_cache.invalidate('game', *Game.objects.filter(gamer=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def forget_user_games(sender, instance, **kwargs):
+    """Drop the cached games of a changed user, including its groups and permissions"""
+    if kwargs.get('action', '').startswith('pre_'):
+        return
+    if isinstance(instance, User):
+        games = Game.objects.filter(gamer__user=instance)
+    else:
+        # the m2m was changed from the group or permission side
+        games = Game.objects.filter(gamer__user__id__in=kwargs.get('pk_set') or ())
+    detail_cache.invalidate('game', *games.values_list('id', flat=True))
+
+
+# The /events listing shows every event with its attendees, so a change to
+# either retires the cached listings, see levelupapi/list_cache.py.
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def forget_event_listings(sender, **kwargs):
+    """Retire the cached event listings after an event changed"""
+    list_cache.bump_on_commit()
+
+
+# There is deliberately no receiver for EventGamer itself: a delete listener
+# would stop the ORM from running EventView.leave as a single DELETE. signup,
+# leave and levelupapi/cascade.py retire the listings themselves, so only
+# changes made through Event.attendees, e.g. in the admin, are handled here.
+
+@receiver(m2m_changed, sender=Event.attendees.through)
+def forget_attendees(sender, instance, action, pk_set, **kwargs):
+    """Retire the cached listings and the gamers' joined events after attendees changed"""
+    if action.startswith('pre_'):
+        return
+    if isinstance(instance, Gamer):
+        user_ids = [instance.user_id]
+    else:
+        user_ids = Gamer.objects.filter(pk__in=pk_set or ()).values_list('user_id', flat=True)
+    list_cache.bump_on_commit(*user_ids)
+
+
+# The HTML reports cache each gamer's block under the gamer's report
+# version, see levelupapi/report_versions.py.
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def bump_owner_report(sender, instance, raw=False, **kwargs):
+    """Retire the games report block of a changed game's gamer"""
+    if not raw:
+        report_versions.bump([instance.gamer_id])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def bump_organizer_report(sender, instance, raw=False, **kwargs):
+    """Retire the events report block of a changed event's organizer"""
+    if not raw:
+        report_versions.bump([instance.organizer_id])
+
+
+@receiver(post_save, sender=User)
+def bump_user_reports(sender, instance, raw=False, **kwargs):
+    """Retire the report blocks showing a changed user's name"""
+    if not raw:
+        report_versions.bump(Gamer.objects.filter(user=instance).values('id'))
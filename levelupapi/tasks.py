@@ -0,0 +1,99 @@
+"""A small database-backed queue for work that doesn't need to hold up a request
+
+Views call 'enqueue' and return right away; `python manage.py run_tasks`
+picks the work up. A task is any importable function whose arguments can be
+stored as JSON:
+
+    from levelupapi.tasks import enqueue
+    enqueue(rebuild_report, gamer_id=3)
+
+Several workers can run at once: a task is claimed with a conditional UPDATE,
+so only one of them gets it. A failed task is retried with a growing delay
+until it has used up 'max_attempts'. A task whose worker died while running
+it is picked up again once it has been locked for VISIBILITY_TIMEOUT.
+"""
+import datetime
+import traceback
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from levelupapi.models import Task
+
+# seconds a running task may stay locked before another worker takes it over
+VISIBILITY_TIMEOUT = 300
+
+# seconds to wait before the first retry, doubled on every further attempt
+RETRY_DELAY = 10
+
+
+def enqueue(func, *args, delay=0, max_attempts=3, **kwargs):
+    """Queue a call of 'func' (a function or its dotted path) for the worker
+
+    Returns the new Task.
+    """
+    name = func if isinstance(func, str) else f'{func.__module__}.{func.__qualname__}'
+    return Task.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay)
+    )
+
+
+def claim_task():
+    """Lock the oldest task that is due and return it, or None when idle"""
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=VISIBILITY_TIMEOUT)
+    due = (Q(status=Task.PENDING, run_after__lte=now) |
+           Q(status=Task.RUNNING, locked_at__lt=stale))
+
+    for task_id, status, locked_at in Task.objects.filter(due).order_by('run_after', 'id') \
+            .values_list('id', 'status', 'locked_at')[:10]:
+        # only one worker can move the task on from the state it saw it in
+        claimed = Task.objects.filter(id=task_id, status=status, locked_at=locked_at).update(
+            status=Task.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def run_task(task):
+    """Call the task's function and record how it went"""
+    try:
+        func = import_string(task.name)
+        func(*task.args, **task.kwargs)
+    except Exception:  # pylint: disable=broad-except
+        task.last_error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            task.status = Task.PENDING
+            delay = RETRY_DELAY * 2 ** (task.attempts - 1)
+            task.run_after = timezone.now() + datetime.timedelta(seconds=delay)
+        else:
+            task.status = Task.FAILED
+    else:
+        task.status = Task.DONE
+    task.locked_at = None
+    task.save(update_fields=['status', 'run_after', 'locked_at', 'last_error'])
+    return task
+
+
+def run_pending(limit=None):
+    """Run due tasks until there are none left, or 'limit' have run
+
+    Returns how many tasks were run.
+    """
+    count = 0
+    while limit is None or count < limit:
+        task = claim_task()
+        if task is None:
+            break
+        run_task(task)
+        count += 1
+    return count
+
+
+def queue_depth():
+    """Return how many tasks there are of each status"""
+    counts = Task.objects.values('status').annotate(count=Count('id')).order_by()
+    return {row['status']: row['count'] for row in counts}
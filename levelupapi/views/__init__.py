@@ -1,4 +1,8 @@
 from .auth import login_user, register_user
 from .game_type import GameTypeView
 from .game import GameView
-from .event import EventView
\ No newline at end of file
+from .event import EventView
+from .gamer import GamerView
+from .change import ChangeView
+from .leaderboard import LeaderboardView
+from .calendar import calendar_feed
@@ -5,7 +5,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from levelupapi.models import Gamer
+from levelupapi.models import Gamer, GamerStats
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -59,6 +59,9 @@ def register_user(request):
         user=new_user
     )
 
+    # Start the gamer off on the leaderboards with zero events
+    GamerStats.objects.create(gamer=gamer)
+
     # Use the REST Framework's token generator on the new user account
     token = Token.objects.create(user=gamer.user)
     # Return the token to the client
@@ -0,0 +1,33 @@
+"""Helpers for the "?ids=" batch lookup of GameView.list and EventView.list"""
+
+# the most ids one request may ask for
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(value):
+    """Turn an "ids" query string value like "3,1,2" into a list of ints
+
+    Returns None when the value was not given. Repeated ids are kept once, in
+    the place they first appear. Raises ValueError for anything that is not
+    a comma separated list of at most MAX_BATCH_IDS numbers.
+    """
+    if value is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    except ValueError:
+        raise ValueError(f'"{value}" is not a comma separated list of ids') from None
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids can be fetched at once')
+    return ids
+
+
+def fetch_in_order(ids, *querysets):
+    """Load the rows with the given ids from 'querysets', with one query each
+
+    Returns the objects in the order of 'ids', and the ids that were not found.
+    """
+    found = {}
+    for queryset in querysets:
+        found.update(queryset.in_bulk(ids))
+    return [found[pk] for pk in ids if pk in found], [pk for pk in ids if pk not in found]
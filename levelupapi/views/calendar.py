@@ -0,0 +1,165 @@
+"""View module for the iCalendar feed of a gamer's events"""
+import datetime
+import hashlib
+from django.db.models import Count, Max, Q
+from django.http import Http404, HttpResponseNotModified, StreamingHttpResponse
+from levelupapi import recurrence
+from levelupapi.models import Change, Event, EventGamer, Gamer, OccurrenceSignup
+
+# how many events are read from the database at a time while streaming
+CHUNK_SIZE = 200
+
+
+def calendar_feed(request, feed_token):
+    '''Streams the events a gamer organized or joined as an .ics calendar
+
+    Calendar apps can't send an auth token header, so the feed is found by
+    the secret token in its URL. EXAMPLE URL: [ http://localhost:8000/calendar/<token>.ics ]
+
+    Method arguments:
+      request -- The full HTTP request object
+      feed_token -- The gamer's feed token, see EventView.calendar
+    '''
+    gamer_id = Gamer.objects.filter(feed_token=feed_token).values_list('id', flat=True).first()
+    if gamer_id is None:
+        raise Http404('Calendar feed does not exist.')
+
+    # Calendar apps poll often. When nothing changed since their last poll
+    # they get a 304 without a single event being read.
+    etag = f'"{feed_version(gamer_id)}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = StreamingHttpResponse(
+            calendar_lines(gamer_events(gamer_id), occurrence_signups(gamer_id)),
+            content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    return response
+
+
+def gamer_events(gamer_id):
+    """The events a gamer organized or signed up for, soonest first
+
+    Recurring ones come with their rule and their cancelled or moved
+    occurrences, which iterator() prefetches a chunk at a time.
+    """
+    joined = EventGamer.objects.filter(gamer_id=gamer_id).values('event_id')
+    return (Event.objects.filter(Q(organizer_id=gamer_id) | Q(id__in=joined))
+            .select_related('game', 'recurrence')
+            .prefetch_related('occurrenceexception_set')
+            .only('id', 'description', 'starts_at', 'game__title',
+                  'recurrence__frequency', 'recurrence__interval', 'recurrence__until')
+            .order_by('starts_at', 'id'))
+
+
+def occurrence_signups(gamer_id):
+    """The gamer's signups for single occurrences of series they aren't in otherwise"""
+    joined = EventGamer.objects.filter(gamer_id=gamer_id).values('event_id')
+    return (OccurrenceSignup.objects.filter(gamer_id=gamer_id)
+            .exclude(Q(event__organizer_id=gamer_id) | Q(event_id__in=joined))
+            .select_related('event__game', 'event__recurrence')
+            .order_by('date', 'event_id'))
+
+
+def feed_version(gamer_id):
+    """A value that changes whenever the gamer's calendar would change
+
+    Only the Change log entries of the events in the feed count: the ones
+    the gamer organized or joined, and the series of their single
+    occurrence signups. Creates, updates (changes to a recurring event's
+    occurrences as well) and signups of those events are logged there, and
+    the number of them drops when one is deleted. The gamer's own signups
+    are summed up from the (gamer, event) index, their single occurrence
+    signups likewise. The feed shows the titles of its events' games too,
+    so the newest change to one of those games counts as well.
+    """
+    single = OccurrenceSignup.objects.filter(gamer_id=gamer_id)
+    feed = Event.objects.filter(Q(id__in=gamer_events(gamer_id).order_by().values('id')) |
+                                Q(id__in=single.values('event_id')))
+    events = feed.aggregate(count=Count('id'))['count']
+    last_change = (Change.objects.filter(model='event', object_id__in=feed.values('id'))
+                   .aggregate(last=Max('id'))['last'])
+    last_game_change = (Change.objects.filter(model='game', object_id__in=feed.values('game_id'))
+                        .aggregate(last=Max('id'))['last'])
+    signups = EventGamer.objects.filter(gamer_id=gamer_id).aggregate(count=Count('id'), last=Max('id'))
+    occurrences = single.aggregate(count=Count('id'), last=Max('id'))
+    version = (f"{gamer_id}:{events}:{last_change}:{last_game_change}:{signups['count']}:{signups['last']}:"
+               f"{occurrences['count']}:{occurrences['last']}")
+    return hashlib.md5(version.encode()).hexdigest()
+
+
+def calendar_lines(events, single_occurrences):
+    """Yield the feed one line at a time, reading 'events' in chunks
+
+    A recurring event is one VEVENT with an RRULE. Its cancelled occurrences
+    are EXDATEs, and each moved one is a VEVENT of its own with the same UID
+    and the RECURRENCE-ID it was moved from. 'single_occurrences' are
+    OccurrenceSignups, each a VEVENT for just that occurrence.
+    """
+    yield 'BEGIN:VCALENDAR\r\n'
+    yield 'VERSION:2.0\r\n'
+    yield 'PRODID:-//Level Up//Gamer Events//EN\r\n'
+    yield 'X-WR-CALNAME:Level Up events\r\n'
+    for event in events.iterator(chunk_size=CHUNK_SIZE):
+        rule = recurrence.rule_of(event)
+        uid = f'event-{event.id}@levelup'
+        if rule is None:
+            yield from vevent(event, uid, event.starts_at)
+            continue
+        exceptions = sorted(event.occurrenceexception_set.all(), key=lambda exception: exception.date)
+        extra = [recurrence_rule(rule)]
+        extra += [f'EXDATE:{utc(slot_start(event, exception.date))}'
+                  for exception in exceptions if exception.cancelled]
+        yield from vevent(event, uid, event.starts_at, extra)
+        for exception in exceptions:
+            if not exception.cancelled and exception.starts_at is not None:
+                yield from vevent(event, uid, exception.starts_at,
+                                  [f'RECURRENCE-ID:{utc(slot_start(event, exception.date))}'])
+    for signup in single_occurrences.iterator(chunk_size=CHUNK_SIZE):
+        occurrence = recurrence.find_occurrence(signup.event, signup.date)
+        if occurrence is not None:
+            yield from vevent(signup.event, f'event-{signup.event_id}-{signup.date:%Y%m%d}@levelup',
+                              occurrence.starts_at)
+    yield 'END:VCALENDAR\r\n'
+
+
+def vevent(event, uid, starts_at, extra=()):
+    """Yield the lines of one VEVENT of 'event' starting at 'starts_at'"""
+    yield 'BEGIN:VEVENT\r\n'
+    yield f'UID:{uid}\r\n'
+    yield f'DTSTAMP:{utc(starts_at)}\r\n'
+    yield f'DTSTART:{utc(starts_at)}\r\n'
+    for line in extra:
+        yield f'{line}\r\n'
+    yield fold(f'SUMMARY:{escape(event.game.title)}')
+    yield fold(f'DESCRIPTION:{escape(event.description)}')
+    yield 'END:VEVENT\r\n'
+
+
+def recurrence_rule(rule):
+    """The RRULE line of an EventRecurrence; UNTIL takes in the whole last day"""
+    line = f'RRULE:FREQ={rule.frequency.upper()};INTERVAL={rule.interval}'
+    if rule.until is not None:
+        line += f';UNTIL={rule.until:%Y%m%d}T235959Z'
+    return line
+
+
+def slot_start(event, day):
+    """When the event's rule starts its occurrence on 'day', before any move"""
+    return datetime.datetime.combine(day, event.starts_at.timetz())
+
+
+def utc(value):
+    return f'{value:%Y%m%dT%H%M%SZ}'
+
+
+def escape(text):
+    """Escape the characters that mean something in an iCalendar text value"""
+    return (text.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def fold(line):
+    """Split a content line into the 75 character pieces iCalendar allows"""
+    pieces = [line[i:i + 74] for i in range(0, len(line), 74)] or ['']
+    return '\r\n '.join(pieces) + '\r\n'
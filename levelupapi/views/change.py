@@ -0,0 +1,52 @@
+"""View module for handling requests about the change feed"""
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from rest_framework import serializers, status
+from levelupapi.models import Change
+
+
+class ChangeView(ViewSet):
+    """Level up change feed view
+
+    Clients remember the highest 'seq' they have seen and ask for everything
+    after it, instead of downloading all of /events and /games again.
+    """
+
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    def list(self, request):
+        """Handle GET requests for changes after a sequence number
+
+        EXAMPLE URL: [ http://localhost:8000/changes?since=42&limit=100 ]
+
+        Returns:
+            Response -- JSON with the list of changes and the 'since' value
+                        to send on the next poll
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'message': '"since" and "limit" must be whole numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+            # the primary key index is walked from 'since' onwards, so a client
+            # that is already up to date costs one empty index lookup
+        changes = list(Change.objects.filter(id__gt=since).order_by('id')[:limit])
+        serializer = ChangeSerializer(changes, many=True)
+        return Response({
+            'changes': serializer.data,
+            'next_since': changes[-1].id if changes else since
+        })
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    """JSON serializer for change log entries
+    """
+    seq = serializers.IntegerField(source='id')
+
+    class Meta:
+        model = Change
+        fields = ('seq', 'model', 'object_id', 'action', 'changed_on')
@@ -1,16 +1,32 @@
 """View module for handling requests about game types"""
+import datetime
+import heapq
+import itertools
+import secrets
 from asyncio import events
 from urllib import request
+from django.db import connection, transaction
+from django.db.models import Q, Subquery
 from django.http import HttpResponseServerError
+from django.utils import dateparse, timezone
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
-from levelupapi.models import Event, Game, Gamer
+from levelupapi import cascade, detail_cache, leaderboard, list_cache, live, recurrence
+from levelupapi.models import ArchivedEvent, ArchivedEventGamer, Change, Event, EventGamer, Game, Gamer
+from levelupapi.models import EventRecurrence, OccurrenceException, OccurrenceSignup
+from levelupapi.views import streaming
+from levelupapi.views.batch import fetch_in_order, parse_ids
 from rest_framework.decorators import action
+from rest_framework.settings import api_settings
 
 class EventView(ViewSet):
     """Level Up events view"""
 
+        # NDJSON is offered next to the usual renderers, so the list can be asked
+        # for with "Accept: application/x-ndjson", see 'list'
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [streaming.NDJSONRenderer]
+
         # @action is a 'decorator', which allows us to create a custom
         # action that the API will support. In this case, we want the client
         # to make a request to allow a gamer to sign up for an event.
@@ -24,28 +40,189 @@ class EventView(ViewSet):
     def signup(self, request, pk):
             """POST request for a User to sign up for an Event"""
 
-            gamer = Gamer.objects.get(user=request.auth.user)
-            event = Event.objects.get(pk=pk)
-            event.attendees.add(gamer)
-            return Response({'message': 'Gamer added'}, status=status.HTTP_201_CREATED)
-
-                # ABOVE: just like with the "create" method below, we get the
-                # Gamer that is logged in and the Event by its PK. The
-                # 'ManyToManyField' - attendees - on the 'Event' model handles
-                # the heavy lifting.
-                # The 'add' method on 'attendees' creates the relationship btwn 
-                # this Event and Gamer by adding "event_id" && "gamer_id" to
-                # the join table. It returns an HTTP 201 response to the client.
+            event_id = event_pk(pk)
+            with transaction.atomic(), connection.cursor() as db_cursor:
+                db_cursor.execute("""
+                    INSERT INTO levelupapi_eventgamer (gamer_id, event_id)
+                    SELECT r.id, e.id
+                    FROM levelupapi_gamer AS r, levelupapi_event AS e
+                    WHERE r.user_id = %s AND e.id = %s
+                    ON CONFLICT (gamer_id, event_id) DO NOTHING
+                """, (request.auth.user_id, event_id))
+                added = db_cursor.rowcount
+                if added:
+                    leaderboard.bump(leaderboard.JOINED, 1, user_id=request.auth.user_id)
+                    log_update(event_id)
+
+            if added:
+                detail_cache.invalidate('event', event_id)
+                list_cache.bump_on_commit(request.auth.user_id)
+                publish_attendance('signup', event_id, request.auth.user_id)
+                return Response({'message': 'Gamer added'}, status=status.HTTP_201_CREATED)
+            if not Event.objects.filter(pk=event_id).exists():
+                return Response({'message': 'Event matching query does not exist.'},
+                                status=status.HTTP_404_NOT_FOUND)
+            return Response({'message': 'Gamer already added'}, status=status.HTTP_200_OK)
+
+                # ABOVE: the gamer that is logged in and the event from the URL are
+                # looked up inside the INSERT itself, so a sign up is one statement.
+                # If the event does not exist the SELECT finds no row and nothing is
+                # inserted. If the gamer already signed up, the unique (gamer, event)
+                # constraint makes "ON CONFLICT DO NOTHING" skip the row, so two
+                # signups racing each other can't create a duplicate.
+                # Only when nothing was inserted do we need a second query, to tell
+                # "already signed up" (200) apart from "no such event" (404).
+                # A new signup also adds one to the gamer's leaderboard count and
+                # logs an update of the event for /changes, since its attendees
+                # changed, in the same transaction as the insert. It drops the
+                # cached copies of the event and of the event listings, and the
+                # gamer's cached joined events.
 
     @action(methods=['delete'], detail=True)
     def leave(self, request, pk):
             """DELETE request for a User to leave an Event"""
-            gamer = Gamer.objects.get(user=request.auth.user)
-            event = Event.objects.get(pk=pk)
-            event.attendees.remove(gamer)
+            event_id = event_pk(pk)
+            with transaction.atomic():
+                removed, _ = EventGamer.objects.filter(
+                    event_id=event_id, gamer__user_id=request.auth.user_id).delete()
+                if removed:
+                    leaderboard.bump(leaderboard.JOINED, -1, user_id=request.auth.user_id)
+                    log_update(event_id)
+            if not removed and not Event.objects.filter(pk=event_id).exists():
+                return Response({'message': 'Event matching query does not exist.'},
+                                status=status.HTTP_404_NOT_FOUND)
+            if removed:
+                detail_cache.invalidate('event', event_id)
+                list_cache.bump_on_commit(request.auth.user_id)
+                publish_attendance('leave', event_id, request.auth.user_id)
             return Response({'message': 'Gamer removed'}, status=status.HTTP_204_NO_CONTENT)
+
+                # ABOVE: EventGamer has nothing depending on it, so the ORM runs
+                # the filtered 'delete' as a single DELETE statement.
     
     
+    @action(methods=['get'], detail=False)
+    def calendar(self, request):
+            """GET request for the URL of the logged in Gamer's calendar feed"""
+            gamer = Gamer.objects.get(user=request.auth.user)
+            if request.query_params.get('reset', None) == 'true' or gamer.feed_token is None:
+                gamer.feed_token = secrets.token_hex(20)
+                gamer.save(update_fields=['feed_token'])
+            url = request.build_absolute_uri(f'/calendar/{gamer.feed_token}.ics')
+            return Response({'url': url})
+
+                # ABOVE: the feed URL is meant to be pasted into a calendar app, so it
+                # carries its own long-lived token instead of the login token.
+                # EXAMPLE URL: [ http://localhost:8000/events/calendar?reset=true ]
+                # makes a new token, so the old feed URL stops working.
+
+    @action(methods=['put', 'delete'], detail=True)
+    def recurrence(self, request, pk):
+            """PUT request to make an Event repeat, DELETE request to stop it repeating"""
+            event = Event.objects.filter(pk=event_pk(pk)).first()
+            if event is None:
+                return Response({'message': 'Event matching query does not exist.'},
+                                status=status.HTTP_404_NOT_FOUND)
+            if request.method == 'DELETE':
+                EventRecurrence.objects.filter(event=event).delete()
+                schedule_changed(event.id)
+                return Response(None, status=status.HTTP_204_NO_CONTENT)
+
+            serializer = RecurrenceSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            EventRecurrence.objects.update_or_create(event=event, defaults=serializer.validated_data)
+            schedule_changed(event.id)
+            return Response(serializer.data)
+
+                # ABOVE: EXAMPLE BODY: { "frequency": "weekly", "interval": 2, "until": "2022-12-31" }
+                # The event's own date and time are the first occurrence. The series
+                # stays one Event row; the other occurrences are never stored.
+                # Changing the rule, or a single occurrence below, is logged as an
+                # update of the event, so /changes and the calendar feeds see it.
+
+    @action(methods=['get'], detail=True)
+    def occurrences(self, request, pk):
+            """GET request for the occurrences of an Event between two dates"""
+            event = Event.objects.filter(pk=event_pk(pk)).select_related('recurrence').first()
+            if event is None:
+                return Response({'message': 'Event matching query does not exist.'},
+                                status=status.HTTP_404_NOT_FOUND)
+            try:
+                start = parse_bound(request.query_params.get('from', None)) or timezone.now()
+                end = (parse_bound(request.query_params.get('to', None), end_of_day=True) or
+                       start + recurrence.DEFAULT_WINDOW)
+            except ValueError as ex:
+                return Response({'message': ex.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+            if end - start > recurrence.MAX_WINDOW:
+                return Response({'message': f'At most {recurrence.MAX_WINDOW.days} days can be asked for at once'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            listing = list(recurrence.occurrences(event, start, end))
+            attendees = recurrence.attendees(event, [occurrence.date for occurrence in listing])
+            return Response([
+                {
+                    'event': event.id,
+                    'date': occurrence.date,
+                    'starts_at': occurrence.starts_at,
+                    'attendees': attendees[occurrence.date]
+                }
+                for occurrence in listing
+            ])
+
+                # ABOVE: EXAMPLE URL: [ http://localhost:8000/events/1/occurrences?from=2022-06-01&to=2022-06-30 ]
+                # Only the occurrences in the window are worked out, along with the
+                # cancelled or moved ones and the signups for those days.
+
+    @action(methods=['put', 'delete'], detail=True, url_path=r'occurrences/(?P<day>\d{4}-\d{2}-\d{2})')
+    def occurrence(self, request, pk, day):
+            """PUT request to cancel or move one occurrence, DELETE request to undo that"""
+            event = Event.objects.filter(pk=event_pk(pk)).select_related('recurrence').first()
+            day = parse_day(day)
+            if event is None or day is None or not recurrence.is_slot(event, day):
+                return Response({'message': 'Occurrence does not exist.'},
+                                status=status.HTTP_404_NOT_FOUND)
+            if request.method == 'DELETE':
+                OccurrenceException.objects.filter(event=event, date=day).delete()
+                schedule_changed(event.id)
+                return Response(None, status=status.HTTP_204_NO_CONTENT)
+
+            serializer = OccurrenceExceptionSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            OccurrenceException.objects.update_or_create(
+                event=event, date=day, defaults=serializer.validated_data)
+            schedule_changed(event.id)
+            return Response(serializer.data)
+
+                # ABOVE: EXAMPLE BODY: { "cancelled": true } or { "starts_at": "2022-06-09T20:00:00Z" }
+                # The day in the URL is the one the rule puts the occurrence on.
+
+    @action(methods=['post'], detail=True, url_path=r'occurrences/(?P<day>\d{4}-\d{2}-\d{2})/signup')
+    def occurrence_signup(self, request, pk, day):
+            """POST request for a User to sign up for one occurrence of an Event"""
+            event = Event.objects.filter(pk=event_pk(pk)).select_related('recurrence').first()
+            day = parse_day(day)
+            if event is None or day is None or recurrence.find_occurrence(event, day) is None:
+                return Response({'message': 'Occurrence does not exist.'},
+                                status=status.HTTP_404_NOT_FOUND)
+            gamer = Gamer.objects.get(user=request.auth.user)
+            _, created = OccurrenceSignup.objects.get_or_create(event=event, date=day, gamer=gamer)
+            if created:
+                log_update(event.id)
+                list_cache.bump_on_commit()
+                return Response({'message': 'Gamer added'}, status=status.HTTP_201_CREATED)
+            return Response({'message': 'Gamer already added'}, status=status.HTTP_200_OK)
+
+    @action(methods=['delete'], detail=True, url_path=r'occurrences/(?P<day>\d{4}-\d{2}-\d{2})/leave')
+    def occurrence_leave(self, request, pk, day):
+            """DELETE request for a User to leave one occurrence of an Event"""
+            day = parse_day(day)
+            event_id = event_pk(pk)
+            if day is not None and OccurrenceSignup.objects.filter(
+                    event_id=event_id, date=day, gamer__user_id=request.auth.user_id).delete()[0]:
+                log_update(event_id)
+                list_cache.bump_on_commit()
+            return Response({'message': 'Gamer removed'}, status=status.HTTP_204_NO_CONTENT)
+
     @property
     def joined(self):
             return self.__joined
@@ -73,10 +250,15 @@ class EventView(ViewSet):
         # 'try' block added to provide user better feedback when a non-existing event
         # was entered. EXAMPLE URL: [ http://localhost:8000/events/478 ]
         # Doesn't exist, so returns: [ "message": "Event matching query does not exist" ]
+        # The serialized event is kept in the cache, so only the first request
+        # after a change to it (see levelupapi/detail_cache.py) hits the DB.
+        # It is kept under the int id the invalidation uses, so "/events/01"
+        # and "/events/1" share one entry
+        event_id = event_pk(pk)
         try:       
-            event = Event.objects.get(pk=pk)              # "get" method in ORM
-            serializer = EventSerializer(event)           # once retrieved, it's passed to serializer
-            return Response(serializer.data)            # serializer.data is passed to response as
+            data = detail_cache.get_or_build('event', event_id, lambda: EventSerializer(
+                Event.objects.get(pk=event_id)).data)   # "get" method in ORM
+            return Response(data)                       # serializer.data is passed to response as
         except Event.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
                                                     # the response body. Using "Response" combines
@@ -99,42 +281,101 @@ class EventView(ViewSet):
         Returns:
             Response -- JSON serialized list of game types
         """
-        events = Event.objects.all()                         # ORM method "all"
-        
         gamer = Gamer.objects.get(user=request.auth.user)
-        # the following three lines allow for passing in a query string parameter via URL.
-            # before sending the 'events' list to the serializer, we can check if a query
-            # string was passed.
-            # EXAMPLE URL: [ http://localhost:8000/events?game=1 ]
-            # URL parsing not required because ViewSet class already has done it
-        game_id = request.query_params.get('game', None)
-        if game_id is not None:
-            events = events.filter(game_id=game_id)
-     
-            # above, the 'request' from the method parameters holds all info for the 
-            # request from client. The 'request.query_params' is a dictionary of any query
-            # parameters that were in the URL. If "game" is not found on the dictionary,
-            # "None" is returned.
-            # After getting value of "game_id", the ORM filter method is used to include
-            # only events with that game id. It is the equivalent of:
-                #   db_cursor.execute(""""
-                #       SELECT *
-                #       FROM levelupapi_event
-                #       WHERE event_id = ?
-                #   """", (game_id,)
-                #   )  
-                
-                # set the 'joined' property on every event 
-        for event in events:
-                # check if gamer is in the attendees list on the event
-            event.joined = gamer in event.attendees.all()
-                    # ABOVE: the 'all' method gets every gamer attending the event.
-                    # 'gamer in event...' evals to True or False depending on
-                    # whether gamer is in attendees list
-            
-         
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
+
+            # the filters are checked first, so a bad value is a 400 before
+            # any events are read. See 'filter_events' for all the filters.
+        try:
+            starts_from = parse_bound(request.query_params.get('from', None))
+            starts_to = parse_bound(request.query_params.get('to', None), end_of_day=True)
+            ids = parse_ids(request.query_params.get('ids', None))
+            window = None if ids is not None else series_window(request.query_params, starts_from, starts_to)
+
+            events = Event.objects.prefetch_related('attendees')
+            if window is not None:
+                events = events.filter(recurrence__isnull=True)
+            sources = [filter_events(events, EventGamer, request.query_params, gamer.id, starts_from, starts_to)]
+        except ValueError as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        include_archived = request.query_params.get('include_archived', None) == 'true'
+
+            # 'prefetch_related' loads the attendees of every listed event in one
+            # extra query, instead of one query per event in the serializer
+
+            # EXAMPLE URL: [ http://localhost:8000/events?from=2022-06-01&to=2022-06-30 ]
+            # with "from", "to" or "upcoming" a recurring event is listed once for
+            # every occurrence in that window instead of once for the series,
+            # see 'occurrence_rows'. Only the series that can have an occurrence
+            # in the window are read.
+        def series_rows():
+            if window is None:
+                return []
+            return occurrence_rows(recurring_series(request.query_params, gamer.id, *window), *window)
+
+            # EXAMPLE URL: [ http://localhost:8000/events?include_archived=true ]
+            # past events moved away by `manage.py archive_events` are only read
+            # when asked for, so the default listing never touches the archive
+        if include_archived:
+            sources.append(filter_events(
+                ArchivedEvent.objects.prefetch_related('attendees'), ArchivedEventGamer,
+                request.query_params, gamer.id, starts_from, starts_to))
+
+            # the 'joined' flag is the only part that depends on the gamer. Their
+            # joined event ids are read once (and then cached) with one query
+            # on the (gamer, event) index, instead of loading the attendees of
+            # every single event to look for the gamer.
+        joined_ids = list_cache.joined_ids(request.auth.user_id, lambda: EventGamer.objects.filter(
+            gamer_id=gamer.id).values_list('event_id', flat=True))
+        if include_archived:
+            joined_ids = joined_ids | set(
+                ArchivedEventGamer.objects.filter(gamer_id=gamer.id).values_list('event_id', flat=True))
+
+            # EXAMPLE URL: [ http://localhost:8000/events?stream=1 ]
+            # sends the events as newline delimited JSON while they are read,
+            # see levelupapi/views/streaming.py. Current and archived events are
+            # both read in order, so merging them keeps the list in order.
+        def joined(row):
+                # a single occurrence can be joined on its own, which its
+                # attendees show
+            if 'occurrence' in row:
+                return gamer.id in row['attendees']
+            return row['id'] in joined_ids
+
+        if ids is None and streaming.wants_stream(request):
+            rows = heapq.merge(
+                *(streaming.serialized_rows(source, EventSerializer) for source in sources),
+                series_rows(), key=row_order)
+            return streaming.ndjson_response(dict(row, joined=joined(row)) for row in rows)
+
+        def serialize():
+                # EXAMPLE URL: [ http://localhost:8000/events?ids=3,1,2 ]
+                # fetches just those events with one query, in the order asked for;
+                # ids that don't exist are listed under "missing"
+            if ids is not None:
+                events, missing = fetch_in_order(ids, *sources)
+                return EventSerializer(events, many=True).data, missing
+            events = sources[0]
+            if len(sources) > 1:
+                events = sorted(itertools.chain(*sources), key=lambda event: (event.starts_at, event.id))
+            data = EventSerializer(events, many=True).data
+            occurrences = series_rows()
+            if occurrences:
+                data = list(heapq.merge(data, occurrences, key=row_order))
+            return data, None
+
+            # the listing is the same for every gamer, so when only shared filters
+            # were used it comes from the cache, see levelupapi/list_cache.py
+        missing = None
+        if ids is None and list_cache.is_shared(request.query_params):
+            data = list_cache.listing(request.query_params, lambda: serialize()[0])
+        else:
+            data, missing = serialize()
+        data = [dict(row, joined=joined(row)) for row in data]
+
+        if missing is not None:
+            return Response({'results': data, 'missing': missing})
+        return Response(data)
                             # above, the event variable is now a list of Event
                             # objects. The events are passed to the serializer class.
                             # "many=True" tells serializer that a LIST versus a SINGLE OBJ
@@ -179,13 +420,15 @@ class EventView(ViewSet):
                     #   """, (request.data["description"], request.data["date"],
                     #   request.data["time"], game, gamer)) ) 
         
-        event = Event.objects.create(
-            description=request.data["description"],
-            date=request.data["date"],
-            time=request.data["time"],
-            game=game,
-            organizer=gamer
-        )
+        with transaction.atomic():
+            event = Event.objects.create(
+                description=request.data["description"],
+                date=request.data["date"],
+                time=request.data["time"],
+                game=game,
+                organizer=gamer
+            )
+            leaderboard.bump(leaderboard.ORGANIZED, 1, gamer_id=gamer.id)
                 # Once 'create' has finished, the 'event' variable is now the new
                 # 'event' instance, including the new 'id'. The object can be 
                 # serialized and returned to the client, just like in 'retrieve' above.        
@@ -203,6 +446,7 @@ class EventView(ViewSet):
         serializer = CreateEventSerializer(event, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        live.publish_event('update', event.id, event.game_id)
         return Response(None, status=status.HTTP_204_NO_CONTENT)   
     
     
@@ -214,12 +458,231 @@ class EventView(ViewSet):
     # The response back to client is HTTP 204.       
            
     def destroy(self, request, pk):
-        event = Event.objects.get(pk=pk)
-        event.delete()
+        # the event's signups go with it, see levelupapi/cascade.py
+        if not cascade.delete_events(Event.objects.filter(pk=event_pk(pk))):
+            return Response({'message': 'Event matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
         return Response(None, status=status.HTTP_204_NO_CONTENT)
     
     
                     
+def publish_attendance(kind, event_id, user_id):
+    """Push a signup or leave to the live streams following the event or its game
+
+    signup and leave never load the event, so the game and gamer ids are only
+    looked up, in one query, while somebody has a stream open.
+    """
+    if not live.broker.has_subscribers():
+        return
+    gamer_id = Gamer.objects.filter(user_id=user_id).values('id')[:1]
+    row = (Event.objects.filter(pk=event_id)
+           .annotate(gamer_id=Subquery(gamer_id))
+           .values_list('game_id', 'gamer_id')
+           .first())
+    if row is not None:
+        live.publish_event(kind, event_id, row[0], gamer=row[1])
+
+
+def schedule_changed(event_id):
+    """Record that the occurrences of a recurring event changed
+
+    The rule and its exceptions aren't part of the Event row, so no signal
+    logs the change; this adds the Change an update of the event would, and
+    retires the cached listings, which show every occurrence.
+    """
+    log_update(event_id)
+    list_cache.bump_on_commit()
+
+
+def log_update(event_id):
+    """Add an "update" Change for an event whose row didn't change
+
+    Signups and the schedule of a recurring event are part of what /events
+    shows, so a client syncing through /changes has to hear about them too.
+    """
+    Change.objects.create(model='event', object_id=event_id, action=Change.UPDATE)
+
+
+def filter_events(events, signups, params, gamer_id, starts_from, starts_to):
+    """Apply the /events query string filters to 'events'
+
+    'events' is an Event or ArchivedEvent queryset, and 'signups' the
+    matching EventGamer or ArchivedEventGamer model. 'starts_from' and
+    'starts_to' are the "from" and "to" values after 'parse_bound'.
+    Raises ValueError when "game" or "organizer" isn't a whole number.
+    """
+        # the following three lines allow for passing in a query string parameter via URL.
+        # EXAMPLE URL: [ http://localhost:8000/events?game=1 ]
+        # URL parsing not required because ViewSet class already has done it
+    game_id = parse_id(params, 'game')
+    if game_id is not None:
+        events = events.filter(game_id=game_id)
+ 
+        # above, 'params' is the 'request.query_params' dictionary of any query
+        # parameters that were in the URL. If "game" is not found on the dictionary,
+        # "None" is returned.
+        # After getting value of "game_id", the ORM filter method is used to include
+        # only events with that game id. It is the equivalent of:
+            #   db_cursor.execute(""""
+            #       SELECT *
+            #       FROM levelupapi_event
+            #       WHERE event_id = ?
+            #   """", (game_id,)
+            #   )  
+
+        # the date filters below all run against the 'starts_at' column, which
+        # is indexed on its own and together with 'game' and 'organizer'.
+        # EXAMPLE URL: [ http://localhost:8000/events?from=2022-05-01&to=2022-05-31 ]
+        # "from" and "to" accept a date (YYYY-MM-DD) or a full datetime. A plain
+        # "to" date includes every event on that day.
+    organizer_id = parse_id(params, 'organizer')
+    if organizer_id is not None:
+        events = events.filter(organizer_id=organizer_id)
+
+    if starts_from is not None:
+        events = events.filter(starts_at__gte=starts_from)
+    if starts_to is not None:
+        events = events.filter(starts_at__lt=starts_to)
+    if params.get('upcoming', None) == 'true':
+        events = events.filter(starts_at__gte=timezone.now())
+
+        # "My events": EXAMPLE URL: [ http://localhost:8000/events?joined=true ]
+        # the event ids come from the EventGamer join table, filtered by this
+        # gamer's id, so the (gamer, event) index does the work and the cost
+        # follows how many events the gamer joined, not how many events exist.
+    if params.get('joined', None) == 'true':
+        events = events.filter(
+            id__in=signups.objects.filter(gamer_id=gamer_id).values('event_id'))
+    if params.get('organized', None) == 'true':
+        events = events.filter(organizer_id=gamer_id)
+
+    return events.order_by('starts_at', 'id')
+
+
+def series_window(params, starts_from, starts_to):
+    """Return the [start, end) recurring events are expanded for, or None without date filters
+
+    A side of the window that wasn't given is recurrence.DEFAULT_WINDOW
+    away from the other one, or starts now. "upcoming" moves the start up to
+    now. Raises ValueError for a window longer than recurrence.MAX_WINDOW.
+    """
+    upcoming = params.get('upcoming', None) == 'true'
+    if starts_from is None and starts_to is None and not upcoming:
+        return None
+    now = timezone.now()
+    if starts_from is not None:
+        start = starts_from
+    elif starts_to is not None and not upcoming:
+        start = starts_to - recurrence.DEFAULT_WINDOW
+    else:
+        start = now
+    if upcoming:
+        start = max(start, now)
+    end = starts_to or start + recurrence.DEFAULT_WINDOW
+    if end - start > recurrence.MAX_WINDOW:
+        raise ValueError(f'Recurring events can be listed for at most {recurrence.MAX_WINDOW.days} days at once')
+    return start, end
+
+
+def recurring_series(params, gamer_id, start, end):
+    """The recurring events that pass the /events filters and may occur in [start, end)"""
+    params = {name: value for name, value in params.items() if name != 'upcoming'}
+    series = filter_events(Event.objects.filter(recurrence__isnull=False).select_related('recurrence'),
+                           EventGamer, params, gamer_id, None, None)
+    return series.filter(Q(recurrence__until__isnull=True) | Q(recurrence__until__gte=start.date()),
+                         starts_at__lt=end)
+
+
+def occurrence_rows(series, start, end):
+    """Serialize the occurrences of the recurring 'series' in [start, end), soonest first
+
+    A row reads like the series' own, with the date and time the occurrence
+    starts at and its own attendees. 'occurrence' is the day the rule puts
+    it on, as used by the /events/<id>/occurrences/<day> URLs.
+    """
+    rows = [
+        {
+            'id': event.id,
+            'game': event.game_id,
+            'organizer': event.organizer_id,
+            'description': event.description,
+            'date': occurrence.starts_at.date().isoformat(),
+            'time': occurrence.starts_at.time().isoformat(),
+            'attendees': attendees,
+            'occurrence': occurrence.date.isoformat()
+        }
+        for event, occurrence, attendees in recurrence.expand(series, start, end)
+    ]
+    return sorted(rows, key=row_order)
+
+
+def row_order(row):
+    """Sort key of a serialized event, the same order as ('starts_at', 'id')"""
+    return (row['date'], row['time'], row['id'])
+
+
+def event_pk(pk):
+    """Return the event id from the URL as an int, or 0 when it isn't a number
+
+    No event has id 0, so a bad id ends up as a normal 404.
+    """
+    try:
+        return int(pk)
+    except ValueError:
+        return 0
+
+
+def parse_day(day):
+    """Return the date of an occurrence URL, or None for a day like 2022-02-30
+
+    The URL pattern only lets "YYYY-MM-DD" through, which can still be a day
+    that doesn't exist.
+    """
+    try:
+        return dateparse.parse_date(day)
+    except ValueError:
+        return None
+
+
+def parse_id(params, name):
+    """Return the query string value 'name' as an int, or None when it was not given
+
+    Raises ValueError for anything that is not a whole number.
+    """
+    value = params.get(name, None)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'"{name}" must be a whole number') from None
+
+
+def parse_bound(value, end_of_day=False):
+    """Turn a "from"/"to" query string value into a timezone aware datetime
+
+    Returns None when the value was not given. A bare date becomes midnight
+    at the start of that day, or of the next day when 'end_of_day' is set.
+    Raises ValueError for anything that is not a date or datetime.
+    """
+    if value is None:
+        return None
+    try:
+        day = dateparse.parse_date(value)
+        bound = None if day is not None else dateparse.parse_datetime(value)
+    except ValueError:
+        day = bound = None
+    if day is not None:
+        if end_of_day:
+            day += datetime.timedelta(days=1)
+        bound = datetime.datetime.combine(day, datetime.time())
+    if bound is None:
+        raise ValueError(f'"{value}" is not a valid date or datetime')
+    if timezone.is_naive(bound):
+        bound = timezone.make_aware(bound, datetime.timezone.utc)
+    return bound
+
+
 class EventSerializer(serializers.ModelSerializer):
         # the Serializer class determines how the Python data should be serialized
         # to be sent back to the client.
@@ -246,6 +709,23 @@ class CreateEventSerializer(serializers.ModelSerializer):
         model = Event
         fields = ('id', 'description', 'date', 'time', 'game_id')               
         
+
+
+class RecurrenceSerializer(serializers.ModelSerializer):
+    """JSON serializer to validate/save the rule of a recurring event
+    """
+    class Meta:
+        model = EventRecurrence
+        fields = ('frequency', 'interval', 'until')
+        extra_kwargs = {'interval': {'min_value': 1}}
+
+
+class OccurrenceExceptionSerializer(serializers.ModelSerializer):
+    """JSON serializer to validate/save a cancelled or moved occurrence
+    """
+    class Meta:
+        model = OccurrenceException
+        fields = ('cancelled', 'starts_at')
     
     
   # ===========================================================
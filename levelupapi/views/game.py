@@ -1,16 +1,27 @@
 """View module for handling requests about game types"""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.http import HttpResponseServerError
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
+from rest_framework.settings import api_settings
+from levelupapi import cascade, detail_cache
 from levelupapi.models import Game, Gamer, GameType
 from levelupapi.views import GameTypeView, game_type
+from levelupapi.views import streaming
+from levelupapi.views.batch import fetch_in_order, parse_ids
 
 
 
 class GameView(ViewSet):
     """Level up game view"""
 
+        # NDJSON is offered next to the usual renderers, so the list can be asked
+        # for with "Accept: application/x-ndjson", see 'list'
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [streaming.NDJSONRenderer]
+
     def retrieve(self, request, pk):
         # this 'retrieve' method will get a single object from the DB based on
         # the PK in the URL. 
@@ -26,10 +37,15 @@ class GameView(ViewSet):
         # 'try' block added to provide user better feedback when a non-existing game 
         # was entered. EXAMPLE URL: [ http://localhost:8000/games/478 ]
         # Doesn't exist, so returns: [ "message": "Game matching query does not exist" ]
+        # The serialized game is kept in the cache, so only the first request
+        # after a change to it (see levelupapi/detail_cache.py) hits the DB.
+        # It is kept under the int id the invalidation uses, so "/games/01"
+        # and "/games/1" share one entry
+        game_id = game_pk(pk)
         try:       
-            game = Game.objects.get(pk=pk)              # "get" method in ORM
-            serializer = GameSerializer(game)           # once retrieved, it's passed to serializer
-            return Response(serializer.data)            # serializer.data is passed to response as
+            data = detail_cache.get_or_build('game', game_id, lambda: GameSerializer(
+                Game.objects.select_related('game_type', 'gamer__user').get(pk=game_id)).data)
+            return Response(data)                       # serializer.data is passed to response as
         except Game.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
                                                     # the response body. Using "Response" combines
@@ -52,7 +68,12 @@ class GameView(ViewSet):
         Returns:
             Response -- JSON serialized list of games
         """
-        games = Game.objects.all()                         # ORM method "all"
+        games = (Game.objects                                  # ORM method "all"
+                 .select_related('game_type', 'gamer__user')
+                 .prefetch_related('gamer__user__groups', 'gamer__user__user_permissions'))
+            # 'select_related' joins in the game type, gamer and user that the
+            # serializer's "depth = 2" shows, and 'prefetch_related' loads the
+            # user's groups and permissions once, instead of doing it all per game
         
             # the following three lines allow for passing in a query string parameter via URL.
             # before sending the 'games' list to the serializer, we can check if a query
@@ -75,6 +96,33 @@ class GameView(ViewSet):
                 #       WHERE game_type_id = ?
                 #   """", (game_type,)
                 #   )
+
+            # EXAMPLE URL: [ http://localhost:8000/games?search=milton ]
+            # the "search" query string matches words at the start of the title
+            # or the maker. On SQLite the lookup goes through the FTS5 index
+            # built in migration 0003, so it never scans the whole game table.
+        search = request.query_params.get('search', None)
+        if search is not None:
+            games = search_games(games, search)
+
+            # EXAMPLE URL: [ http://localhost:8000/games?ids=3,1,2 ]
+            # fetches just those games with one query, instead of a request per
+            # game. They come back in the order asked for, and any id that
+            # doesn't exist is listed under "missing".
+        try:
+            ids = parse_ids(request.query_params.get('ids', None))
+        except ValueError as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        if ids is not None:
+            games, missing = fetch_in_order(ids, games)
+            serializer = GameSerializer(games, many=True)
+            return Response({'results': serializer.data, 'missing': missing})
+
+            # EXAMPLE URL: [ http://localhost:8000/games?stream=1 ]
+            # sends the games as newline delimited JSON while they are read, a
+            # chunk at a time, see levelupapi/views/streaming.py
+        if streaming.wants_stream(request):
+            return streaming.ndjson_response(streaming.serialized_rows(games, GameSerializer))
          
         serializer = GameSerializer(games, many=True)
         return Response(serializer.data)
@@ -161,10 +209,47 @@ class GameView(ViewSet):
     # The response back to client is HTTP 204.       
            
     def destroy(self, request, pk):
-        game = Game.objects.get(pk=pk)
-        game.delete()
+        # the game's events and their signups go with it, each table with a
+        # single DELETE, instead of loading all of them into memory first
+        if not cascade.delete_game(game_pk(pk)):
+            return Response({'message': 'Game matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
         return Response(None, status=status.HTTP_204_NO_CONTENT)
                     
+def game_pk(pk):
+    """Return the game id from the URL as an int, or 0 when it isn't a number
+
+    No game has id 0, so a bad id ends up as a normal 404.
+    """
+    try:
+        return int(pk)
+    except ValueError:
+        return 0
+
+
+def search_games(games, search):
+    """Narrow a Game queryset down to games whose title or maker match 'search'
+
+    Each word in 'search' is matched as a prefix, and all words must match.
+    """
+    terms = search.split()
+    if not terms:
+        return games
+
+    if connection.vendor == 'sqlite':
+        # quote every term so characters like '-' or '"' typed by the client
+        # can't be read as FTS5 query syntax, then add '*' for a prefix match
+        match = ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+        return games.filter(id__in=RawSQL(
+            "SELECT rowid FROM levelupapi_game_fts WHERE levelupapi_game_fts MATCH %s",
+            (match,)
+        ))
+
+    for term in terms:
+        games = games.filter(Q(title__icontains=term) | Q(maker__icontains=term))
+    return games
+
+
 class GameSerializer(serializers.ModelSerializer):
         # the Serializer class determines how the Python data should be serialized
         # to be sent back to the client.
@@ -0,0 +1,80 @@
+"""View module for handling requests about gamer profiles"""
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework.decorators import action
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from rest_framework import serializers, status
+from levelupapi.models import ArchivedEvent, ArchivedEventGamer, Event, EventGamer, Game, Gamer
+
+
+class GamerView(ViewSet):
+    """Level up gamer profiles view"""
+
+    def retrieve(self, request, pk):
+        """Handle GET requests for a single gamer's profile
+
+        EXAMPLE URL: [ http://localhost:8000/gamers/1 ]
+
+        Returns:
+            Response -- JSON serialized profile with the gamer's counts
+        """
+        try:
+            gamer = profiles().get(pk=gamer_pk(pk))
+        except Gamer.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
+        return Response(GamerProfileSerializer(gamer).data)
+
+    @action(methods=['get'], detail=False)
+    def me(self, request):
+        """GET request for the logged in gamer's own profile
+
+        EXAMPLE URL: [ http://localhost:8000/gamers/me ]
+        """
+        gamer = profiles().get(user_id=request.auth.user_id)
+        return Response(GamerProfileSerializer(gamer).data)
+
+
+def gamer_pk(pk):
+    """Return the gamer id from the URL as an int, or 0 when it isn't a number
+
+    No gamer has id 0, so a bad id ends up as a normal 404.
+    """
+    try:
+        return int(pk)
+    except ValueError:
+        return 0
+
+
+def profiles():
+    """Gamers with their user and their three counts, read in one statement
+
+    Every count is a correlated subquery on an index that starts with the
+    gamer (Game.gamer, Event's (organizer, starts_at) and EventGamer's unique
+    (gamer, event), and the same ones on the archive tables), so a profile
+    costs the same however big the tables get. Archived events still count,
+    the same as on the leaderboards (see leaderboard.rebuild).
+    """
+    def count(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(count=Count('id')).values('count')), 0)
+
+    return Gamer.objects.select_related('user').annotate(
+        games_owned=count(Game, 'gamer'),
+        events_organized=count(Event, 'organizer') + count(ArchivedEvent, 'organizer'),
+        events_joined=count(EventGamer, 'gamer') + count(ArchivedEventGamer, 'gamer')
+    )
+
+
+class GamerProfileSerializer(serializers.ModelSerializer):
+    """JSON serializer for a gamer with the counts from 'profiles'
+    """
+    full_name = serializers.CharField(source='user.get_full_name')
+    games_owned = serializers.IntegerField()
+    events_organized = serializers.IntegerField()
+    events_joined = serializers.IntegerField()
+
+    class Meta:
+        model = Gamer
+        fields = ('id', 'full_name', 'bio', 'games_owned', 'events_organized', 'events_joined')
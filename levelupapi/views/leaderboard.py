@@ -0,0 +1,47 @@
+"""View module for handling requests about the leaderboards"""
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from rest_framework import status
+from levelupapi import leaderboard
+
+
+class LeaderboardView(ViewSet):
+    """Level up leaderboards view"""
+
+    BOARDS = {
+        'organizers': leaderboard.ORGANIZED,
+        'attendees': leaderboard.JOINED,
+    }
+    MAX_LIMIT = 100
+
+    def list(self, request):
+        """Handle GET requests for the top gamers
+
+        EXAMPLE URL: [ http://localhost:8000/leaderboard?by=organizers&limit=10 ]
+        "by" is "organizers" (the default) or "attendees". "limit" is moved into
+        1 to MAX_LIMIT, like the limit of /changes.
+
+        Returns:
+            Response -- JSON serialized list of gamers and their counts
+        """
+        field = self.BOARDS.get(request.query_params.get('by', 'organizers'))
+        if field is None:
+            return Response({'message': '"by" must be "organizers" or "attendees"'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'message': '"limit" must be a whole number'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+            # the counts are kept up to date by EventView, so this only reads
+            # the first 'limit' entries of an index on the GamerStats table
+        return Response([
+            {
+                'gamer_id': stats.gamer_id,
+                'full_name': stats.gamer.user.get_full_name(),
+                'count': getattr(stats, field)
+            }
+            for stats in leaderboard.top(field, limit)
+        ])
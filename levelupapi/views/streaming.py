@@ -0,0 +1,50 @@
+"""Helpers for the streaming mode of GameView.list and EventView.list
+
+With "?stream=1", or an "Accept: application/x-ndjson" header, a list is
+sent as newline delimited JSON, one object per line, while it is being
+read. The rows are read CHUNK_SIZE at a time with a server-side iterator,
+which also runs the queryset's prefetch_related lookups once per chunk, and
+serialized a batch at a time, so memory stays flat however long the
+list is, and the first line goes out as soon as the first batch is read.
+"""
+import itertools
+import json
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+NDJSON = 'application/x-ndjson'
+
+# how many rows are read from the database, and serialized, at a time
+CHUNK_SIZE = 500
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Lets the list views be asked for NDJSON; renders anything else as one line"""
+    media_type = NDJSON
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=JSONEncoder) + '\n'
+
+
+def wants_stream(request):
+    """Whether the client asked for the streaming mode"""
+    return (request.query_params.get('stream', None) in ('1', 'true') or
+            NDJSON in request.headers.get('Accept', ''))
+
+
+def serialized_rows(queryset, serializer_class):
+    """Yield the serialized rows of 'queryset', reading and serializing a chunk at a time"""
+    rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        batch = list(itertools.islice(rows, CHUNK_SIZE))
+        if not batch:
+            return
+        yield from serializer_class(batch, many=True).data
+
+
+def ndjson_response(rows):
+    """Stream 'rows' to the client, one JSON object per line"""
+    lines = (json.dumps(row, cls=JSONEncoder) + '\n' for row in rows)
+    return StreamingHttpResponse(lines, content_type=NDJSON)
@@ -0,0 +1,184 @@
+"""Reports too big to build inside a request, written to a file in the background
+
+A client posts to /reports/jobs and gets the job id back right away. The
+run_tasks worker (see levelupapi/tasks.py) then walks the report's rows
+with a server-side iterator and writes them, gzip compressed, as CSV or
+newline delimited JSON to REPORT_JOB_DIR. The job's row counts show the
+progress, and once it is done the file can be downloaded.
+
+Jobs don't stay around forever: 'expire_jobs' deletes finished jobs and
+their files after REPORT_JOB_TTL seconds, and 'fail_stale_jobs' gives up on
+jobs that haven't finished REPORT_JOB_TIMEOUT seconds after they were
+submitted. `python manage.py cleanup_report_jobs` runs both.
+"""
+import csv
+import datetime
+import gzip
+import json
+import os
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+from levelupapi.models import Event
+from levelupapi.tasks import enqueue
+from levelupreports.models import ReportJob
+from levelupreports.views.analytics.attendancebyskill import attendance_by_skill
+from levelupreports.views.analytics.eventsbymonth import events_by_month
+from levelupreports.views.analytics.populargames import DEFAULT_LIMIT, MAX_LIMIT, popular_games
+
+# how many rows are read from the database at a time, and written between
+# two progress updates
+CHUNK_SIZE = 1000
+
+# seconds a finished job and its file are kept, and seconds a job may take
+# from being submitted until it is done, when the settings don't say
+REPORT_JOB_TTL = 7 * 24 * 60 * 60
+REPORT_JOB_TIMEOUT = 60 * 60
+
+
+def all_events(params):
+    """Every event with its game, organizer and attendance"""
+    events = Event.objects.all()
+    if params['game'] is not None:
+        events = events.filter(game_id=params['game'])
+    return (events.values('id', 'description', 'starts_at',
+                          game_title=F('game__title'), organizer_name=F('organizer__user__username'))
+            .annotate(attendance=Count('eventgamer'))
+            .order_by('starts_at', 'id'))
+
+
+# report name: (function returning the rows, the whole number parameters it takes)
+REPORTS = {
+    'events': (all_events, ('game',)),
+    'populargames': (popular_games, ('limit', 'type')),
+    'eventsbymonth': (events_by_month, ('year',)),
+    'attendancebyskill': (attendance_by_skill, ('type',)),
+}
+
+
+def job_dir():
+    return getattr(settings, 'REPORT_JOB_DIR', os.path.join(settings.BASE_DIR, 'report_jobs'))
+
+
+def job_path(job):
+    return os.path.join(job_dir(), job.file_name)
+
+
+def file_name(job):
+    """The name the job's file gets once it is done"""
+    return f'{job.id}-{job.report}.{job.format}.gz'
+
+
+def submit(user, report, file_format, params):
+    """Create a ReportJob and queue it for the worker
+
+    Raises ValueError for an unknown report or format, parameters that
+    aren't an object of whole numbers, or a "limit" below 1. A "limit" above
+    the one /reports/populargames allows is lowered to it.
+    """
+    if report not in REPORTS:
+        raise ValueError(f'"report" must be one of {", ".join(sorted(REPORTS))}')
+    if file_format not in dict(ReportJob.FORMATS):
+        raise ValueError('"format" must be "csv" or "ndjson"')
+    if not isinstance(params, dict):
+        raise ValueError('"params" must be an object')
+    try:
+        params = {name: None if params.get(name) is None else int(params[name])
+                  for name in REPORTS[report][1]}
+    except (TypeError, ValueError):
+        raise ValueError('Report parameters must be whole numbers') from None
+    if 'limit' in params:
+        if params['limit'] is None:
+            params['limit'] = DEFAULT_LIMIT
+        elif params['limit'] < 1:
+            raise ValueError('"limit" must be at least 1')
+        params['limit'] = min(params['limit'], MAX_LIMIT)
+
+    job = ReportJob.objects.create(user=user, report=report, format=file_format, params=params)
+    enqueue(generate, job.id, max_attempts=1)
+    return job
+
+
+def generate(job_id):
+    """Write the job's report to its file, run by the worker
+
+    Every status change only applies to the job in the status this left it
+    in, so a job that fail_stale_jobs gave up on meanwhile stays failed.
+    """
+    job = ReportJob.objects.get(pk=job_id)
+    path = os.path.join(job_dir(), file_name(job))
+    pending = ReportJob.objects.filter(pk=job.id, status=ReportJob.PENDING)
+    running = ReportJob.objects.filter(pk=job.id, status=ReportJob.RUNNING)
+    try:
+        rows = REPORTS[job.report][0](job.params)
+        if not pending.update(status=ReportJob.RUNNING, rows_total=rows.count(), rows_written=0):
+            return
+        os.makedirs(job_dir(), exist_ok=True)
+        # written under a temporary name, so a download never sees half a file
+        with gzip.open(path + '.part', 'wt', newline='') as output:
+            write_rows(job, rows, output)
+        os.replace(path + '.part', path)
+    except Exception as ex:  # pylint: disable=broad-except
+        ReportJob.objects.filter(pk=job.id, status__in=(ReportJob.PENDING, ReportJob.RUNNING)).update(
+            status=ReportJob.FAILED, error=str(ex), finished_on=timezone.now())
+        remove(path + '.part')
+        return
+    if not running.update(status=ReportJob.DONE, file_name=os.path.basename(path), finished_on=timezone.now()):
+        remove(path)
+
+
+def remove(path):
+    """Delete the file at 'path', if there is one"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def expire_jobs(now=None):
+    """Delete finished jobs older than REPORT_JOB_TTL, with their files
+
+    Returns how many jobs were deleted.
+    """
+    ttl = getattr(settings, 'REPORT_JOB_TTL', REPORT_JOB_TTL)
+    cutoff = (now or timezone.now()) - datetime.timedelta(seconds=ttl)
+    expired = ReportJob.objects.filter(status__in=(ReportJob.DONE, ReportJob.FAILED), finished_on__lt=cutoff)
+    count = 0
+    for job in expired.only('id', 'report', 'format').iterator(chunk_size=CHUNK_SIZE):
+        path = os.path.join(job_dir(), file_name(job))
+        remove(path)
+        remove(path + '.part')
+        count += ReportJob.objects.filter(pk=job.id).delete()[0]
+    return count
+
+
+def fail_stale_jobs(now=None):
+    """Mark jobs that are still pending or running REPORT_JOB_TIMEOUT after they were submitted as failed
+
+    Their worker died, or is stuck; a client following them sees the error
+    instead of waiting forever. Returns how many jobs were marked.
+    """
+    now = now or timezone.now()
+    timeout = getattr(settings, 'REPORT_JOB_TIMEOUT', REPORT_JOB_TIMEOUT)
+    return ReportJob.objects.filter(
+        status__in=(ReportJob.PENDING, ReportJob.RUNNING),
+        created_on__lt=now - datetime.timedelta(seconds=timeout)
+    ).update(status=ReportJob.FAILED, error='The report took too long and was given up on.', finished_on=now)
+
+
+def write_rows(job, rows, output):
+    """Write 'rows' to 'output' in the job's format, recording the progress"""
+    writer = None
+    written = 0
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        if job.format == ReportJob.CSV:
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+        else:
+            output.write(json.dumps(row, default=str) + '\n')
+        written += 1
+        if written % CHUNK_SIZE == 0:
+            ReportJob.objects.filter(pk=job.id).update(rows_written=written)
+    ReportJob.objects.filter(pk=job.id).update(rows_written=written)
@@ -0,0 +1,11 @@
+"""Management command that expires old report jobs and gives up on stuck ones"""
+from django.core.management.base import BaseCommand
+from levelupreports.jobs import expire_jobs, fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Delete finished report jobs past REPORT_JOB_TTL with their files, and fail jobs past REPORT_JOB_TIMEOUT'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Failed {fail_stale_jobs()} stuck job(s)')
+        self.stdout.write(f'Deleted {expire_jobs()} expired job(s)')
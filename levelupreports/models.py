@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+class ReportJob(models.Model):
+    """A report being written to a file by the run_tasks worker
+
+    See levelupreports/jobs.py. 'rows_written' out of 'rows_total' is the
+    progress shown while it runs; 'file_name' is set once the file is done.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+    FORMATS = [(CSV, 'CSV'), (NDJSON, 'Newline delimited JSON')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    report = models.CharField(max_length=30)
+    params = models.JSONField(default=dict)
+    format = models.CharField(max_length=6, choices=FORMATS, default=CSV)
+    status = models.CharField(max_length=7, choices=STATUSES, default=PENDING)
+    rows_written = models.IntegerField(default=0)
+    rows_total = models.IntegerField(null=True, blank=True)
+    file_name = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
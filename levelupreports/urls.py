@@ -1,9 +1,19 @@
 from django.urls import path
 from .views import UserGameList
 from .views import UserEventList
+from .views import PopularGameList, EventsByMonthList, AttendanceBySkillList
+from .views import ReportJobView
 
 
 urlpatterns = [
     path('reports/usergames', UserGameList.as_view()),
+    path('reports/usergames/<int:gamer_id>', UserGameList.as_view()),
     path('reports/userevents', UserEventList.as_view()),
+    path('reports/userevents/<int:gamer_id>', UserEventList.as_view()),
+    path('reports/populargames', PopularGameList.as_view()),
+    path('reports/eventsbymonth', EventsByMonthList.as_view()),
+    path('reports/attendancebyskill', AttendanceBySkillList.as_view()),
+    path('reports/jobs', ReportJobView.as_view({'post': 'create'})),
+    path('reports/jobs/<int:pk>', ReportJobView.as_view({'get': 'retrieve'})),
+    path('reports/jobs/<int:pk>/download', ReportJobView.as_view({'get': 'download'})),
 ]
@@ -1,2 +1,6 @@
 from .users.gamesbyuser import UserGameList
-from .users.eventsbyuser import UserEventList
\ No newline at end of file
+from .users.eventsbyuser import UserEventList
+from .analytics.populargames import PopularGameList
+from .analytics.eventsbymonth import EventsByMonthList
+from .analytics.attendancebyskill import AttendanceBySkillList
+from .jobs.reportjob import ReportJobView
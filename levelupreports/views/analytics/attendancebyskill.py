@@ -0,0 +1,42 @@
+"""Module for generating the average attendance by skill level report"""
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.shortcuts import render
+from django.views import View
+from levelupapi.models import Event, EventGamer
+from levelupreports.views.helpers import cached_report, int_param
+
+
+class AttendanceBySkillList(View):
+    def get(self, request):
+        # EXAMPLE URL: [ http://localhost:8000/reports/attendancebyskill?type=2 ]
+        params = {
+            'type': int_param(request, 'type')
+        }
+
+        # The template string must match the file name of the html template
+        template = 'analytics/attendance_by_skill.html'
+
+        # The context will be a dictionary that the template can access to show data
+        context = {
+            "skill_list": cached_report('attendancebyskill', params, lambda: list(attendance_by_skill(params)))
+        }
+
+        return render(request, template, context)
+
+
+def attendance_by_skill(params):
+    """The rows of the attendance by skill level report, for the view and report jobs"""
+    # One grouped query: a correlated subquery counts the signups of each
+    # event, then AVG() over those counts is taken per skill level.
+    attendance = (EventGamer.objects.filter(event=OuterRef('pk'))
+                  .order_by().values('event').annotate(count=Count('id')).values('count'))
+    events = Event.objects.all()
+    if params['type'] is not None:
+        events = events.filter(game__game_type_id=params['type'])
+    return (
+        events.annotate(attendance=Coalesce(Subquery(attendance, output_field=IntegerField()), 0))
+        .values(skill_level=F('game__skill_level'))
+        .annotate(events=Count('id'), average_attendance=Avg('attendance'))
+        .order_by('skill_level')
+    )
@@ -0,0 +1,42 @@
+"""Module for generating the events per game type per month report"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import Rank, TruncMonth
+from django.shortcuts import render
+from django.views import View
+from levelupapi.models import Event
+from levelupreports.views.helpers import cached_report, int_param
+
+
+class EventsByMonthList(View):
+    def get(self, request):
+        # EXAMPLE URL: [ http://localhost:8000/reports/eventsbymonth?year=2022 ]
+        params = {
+            'year': int_param(request, 'year')
+        }
+
+        # The template string must match the file name of the html template
+        template = 'analytics/events_by_month.html'
+
+        # The context will be a dictionary that the template can access to show data
+        context = {
+            "month_list": cached_report('eventsbymonth', params, lambda: list(events_by_month(params)))
+        }
+
+        return render(request, template, context)
+
+
+def events_by_month(params):
+    """The rows of the events per month report, for the view and report jobs"""
+    # One grouped query: events are counted per game type and per month of
+    # 'starts_at', and RANK() orders the game types within each month.
+    events = Event.objects.all()
+    if params['year'] is not None:
+        events = events.filter(starts_at__year=params['year'])
+    return (
+        events.annotate(month=TruncMonth('starts_at'))
+        .values('month', game_type=F('game__game_type__label'))
+        .annotate(events=Count('id'))
+        .annotate(rank=Window(
+            Rank(), partition_by=[F('month')], order_by=F('events').desc()))
+        .order_by('month', 'rank', 'game_type')
+    )
@@ -0,0 +1,50 @@
+"""Module for generating the most attended games report"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import Rank
+from django.shortcuts import render
+from django.views import View
+from levelupapi.models import Game
+from levelupreports.views.helpers import cached_report, int_param
+
+# how many games the report shows by default, and at most
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+class PopularGameList(View):
+    def get(self, request):
+        # EXAMPLE URL: [ http://localhost:8000/reports/populargames?limit=10&type=2 ]
+        # "limit" is how many games to show (1 to 100), "type" an optional game type id
+        params = {
+            'limit': int_param(request, 'limit', DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT),
+            'type': int_param(request, 'type')
+        }
+
+        # The template string must match the file name of the html template
+        template = 'analytics/popular_games.html'
+
+        # The context will be a dictionary that the template can access to show data
+        context = {
+            "game_list": cached_report('populargames', params, lambda: list(popular_games(params)))
+        }
+
+        return render(request, template, context)
+
+
+def popular_games(params):
+    """The rows of the most attended games report, for the view and report jobs"""
+    # One grouped query: attendance is counted over the event and signup
+    # joins, and RANK() is a window over those counts, so games with the
+    # same attendance share a place.
+    games = Game.objects.all()
+    if params['type'] is not None:
+        games = games.filter(game_type_id=params['type'])
+    return (
+        games.values('id', 'title', 'maker')
+        .annotate(
+            events=Count('event', distinct=True),
+            attendance=Count('event__eventgamer'))
+        .filter(events__gt=0)
+        .annotate(rank=Window(Rank(), order_by=F('attendance').desc()))
+        .order_by('-attendance', 'id')[:params['limit']]
+    )
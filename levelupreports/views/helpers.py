@@ -1,3 +1,18 @@
+from urllib.parse import urlencode
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator
+from django.db.models.functions import Coalesce
+from django.utils.safestring import mark_safe
+from levelupapi.models import Gamer
+
+# how many gamers one page of a paginated report shows
+REPORT_PAGE_SIZE = 25
+
+# seconds the analytics reports keep a result for the same parameters
+REPORT_CACHE_SECONDS = 300
+
+
 def dict_fetch_all(cursor):
     """Return all rows from a cursor as a list of dictionaries"""
     columns = [col[0] for col in cursor.description]
@@ -5,3 +20,100 @@ def dict_fetch_all(cursor):
         dict(zip(columns, row))
         for row in cursor.fetchall()
     ]
+
+
+def report_versions(rows, column, gamer_ids):
+    """Return {gamer id: report version}, in id order, for the gamers a report lists
+
+    'rows' is the Game or Event queryset the report shows, and 'column' its
+    foreign key to the gamer; gamers without such rows are left out, as the
+    report's JOIN leaves them out. 'gamer_ids' is from 'report_gamers'.
+    """
+    gamers = Gamer.objects.filter(id__in=rows.values(column))
+    if gamer_ids is not None:
+        gamers = gamers.filter(id__in=gamer_ids)
+    return dict(gamers.annotate(version=Coalesce('report_version__version', 0))
+                .order_by('id').values_list('id', 'version'))
+
+
+def cached_blocks(fragment, versions):
+    """Return {gamer id: HTML} for the gamers whose {% cache %} block is cached
+
+    'fragment' is the name the report template gives its {% cache %} tag,
+    which varies on the gamer id and version. Only the other gamers' rows
+    need to be queried; the template shows these blocks as they are.
+    """
+    try:
+        fragment_cache = caches['template_fragments']
+    except InvalidCacheBackendError:
+        fragment_cache = caches['default']
+    keys = {make_template_fragment_key(fragment, [gamer_id, version]): gamer_id
+            for gamer_id, version in versions.items()}
+    return {keys[key]: mark_safe(html) for key, html in fragment_cache.get_many(keys).items()}
+
+
+def add_versions(groups, versions, blocks):
+    """Return the report's gamer groups in order, with their version and cached block
+
+    'groups' are the groups built from the queried rows. A gamer in 'blocks'
+    has no rows, so its group is only the id, version and cached HTML.
+    """
+    by_gamer = {group['gamer_id']: group for group in groups}
+    return [dict(by_gamer.get(gamer_id, {'gamer_id': gamer_id}), version=version, block=blocks.get(gamer_id))
+            for gamer_id, version in versions.items()]
+
+
+def report_gamers(request, gamer_id=None):
+    """Work out which gamers a report request covers
+
+    Returns a (gamer_ids, page) pair. 'gamer_ids' is None for the full,
+    unpaginated report. With "?page=N" it holds one page of gamer ids and
+    'page' is the Django Page object for the template's page links.
+    """
+    if gamer_id is not None:
+        return [gamer_id], None
+    if 'page' not in request.GET:
+        return None, None
+    gamers = Gamer.objects.order_by('id').values_list('id', flat=True)
+    page = Paginator(gamers, REPORT_PAGE_SIZE).get_page(request.GET['page'])
+    return list(page), page
+
+
+def gamer_filter(column, gamer_ids):
+    """Return a WHERE clause and its parameters limiting 'column' to 'gamer_ids'
+
+    The clause is empty when 'gamer_ids' is None. 'column' is one of the
+    indexed foreign keys to the gamer table, like "g.gamer_id".
+    """
+    if gamer_ids is None:
+        return "", []
+    if not gamer_ids:
+        return "WHERE 0 = 1", []
+    placeholders = ", ".join(["%s"] * len(gamer_ids))
+    return f"WHERE {column} IN ({placeholders})", list(gamer_ids)
+
+
+def int_param(request, name, default=None, minimum=None, maximum=None):
+    """Read a whole number from the query string, falling back to 'default'
+
+    A number outside 'minimum' and 'maximum' is moved to the nearest of them.
+    """
+    try:
+        value = int(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+    if minimum is not None:
+        value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def cached_report(name, params, build):
+    """Return the rows of report 'name' for 'params', running 'build' on a miss
+
+    'build' is called with no arguments and must return a list. Every
+    different set of parameters is cached on its own.
+    """
+    key = f"report:{name}:{urlencode(sorted(params.items()))}"
+    return cache.get_or_set(key, build, REPORT_CACHE_SECONDS)
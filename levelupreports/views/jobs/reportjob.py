@@ -0,0 +1,77 @@
+"""Module for submitting report jobs, following them and downloading the result"""
+import os
+from django.http import FileResponse
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+from levelupreports import jobs
+from levelupreports.models import ReportJob
+
+
+class ReportJobView(ViewSet):
+    """Level up report jobs view"""
+
+    def create(self, request):
+        """Handle POST requests to start a report job
+
+        EXAMPLE BODY: { "report": "events", "format": "csv", "params": { "game": 1 } }
+
+        Returns:
+            Response -- JSON serialized job with 202 status code, right away
+        """
+        try:
+            job = jobs.submit(request.auth.user, request.data.get('report'),
+                              request.data.get('format', ReportJob.CSV), request.data.get('params') or {})
+        except ValueError as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ReportJobSerializer(job, context={'request': request}).data,
+                        status=status.HTTP_202_ACCEPTED)
+
+    def retrieve(self, request, pk):
+        """Handle GET requests for the status and progress of a job
+
+        Returns:
+            Response -- JSON serialized job, with a 'download' URL once it is done
+        """
+        job = ReportJob.objects.filter(pk=pk, user=request.auth.user).first()
+        if job is None:
+            return Response({'message': 'ReportJob matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(ReportJobSerializer(job, context={'request': request}).data)
+
+    def download(self, request, pk):
+        """Handle GET requests for the file of a finished job
+
+        FileResponse hands the open file to the server, which can send it with
+        sendfile() instead of reading it into Python.
+        """
+        job = ReportJob.objects.filter(pk=pk, user=request.auth.user, status=ReportJob.DONE).first()
+        if job is None or not os.path.exists(jobs.job_path(job)):
+            return Response({'message': 'The report is not ready.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(jobs.job_path(job), 'rb'), as_attachment=True,
+                            filename=job.file_name, content_type='application/gzip')
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """JSON serializer for report jobs
+    """
+    progress = serializers.SerializerMethodField()
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = ('id', 'report', 'format', 'params', 'status', 'rows_written', 'rows_total',
+                  'progress', 'error', 'created_on', 'finished_on', 'download')
+
+    def get_progress(self, job):
+        """How far along the job is, from 0 to 100"""
+        if job.status == ReportJob.DONE:
+            return 100
+        if not job.rows_total:
+            return 0
+        return min(100, job.rows_written * 100 // job.rows_total)
+
+    def get_download(self, job):
+        if job.status != ReportJob.DONE:
+            return None
+        return self.context['request'].build_absolute_uri(f'/reports/jobs/{job.id}/download')
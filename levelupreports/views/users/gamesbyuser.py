@@ -1,17 +1,33 @@
 """Module for generating games by user report"""
 from email.errors import FirstHeaderLineIsContinuationDefect
+from django.http import Http404
 from django.shortcuts import render
-from django.db import connection
+from levelup.db_router import read_connection
 from django.views import View
-from levelupreports.views.helpers import dict_fetch_all
+from levelupapi.models import Game, Gamer
+from levelupreports.views.helpers import add_versions, cached_blocks, dict_fetch_all, gamer_filter
+from levelupreports.views.helpers import report_gamers, report_versions
 
 
 class UserGameList(View):
-    def get(self, request):
-        with connection.cursor() as db_cursor:
+    def get(self, request, gamer_id=None):
+        # EXAMPLE URLs: [ http://localhost:8000/reports/... ] for every gamer,
+        # [ .../<gamer_id> ] for one gamer, or [ ...?page=2 ] for one page of gamers.
+        # The gamer ids end up in a WHERE clause on the indexed foreign key, so
+        # one gamer's report costs the same however many gamers there are.
+        if gamer_id is not None and not Gamer.objects.filter(pk=gamer_id).exists():
+            raise Http404('Gamer matching query does not exist.')
+        gamer_ids, page = report_gamers(request, gamer_id)
+        # every gamer's block is cached under their report version, so only
+        # the rows of gamers whose block isn't cached yet are queried
+        versions = report_versions(Game.objects, 'gamer_id', gamer_ids)
+        blocks = cached_blocks('usergames', versions)
+        where, params = gamer_filter('g.gamer_id', [gamer for gamer in versions if gamer not in blocks])
+
+        with read_connection().cursor() as db_cursor:
 
             # TODO: Write a query to get all games along with the gamer first name, last name, and id
-            db_cursor.execute("""
+            db_cursor.execute(f"""
                     SELECT 
                         g.title,
                         g.maker,
@@ -26,8 +42,10 @@ class UserGameList(View):
                     JOIN levelupapi_gamer AS r
                         ON g.gamer_id = r.id
                     JOIN auth_user AS u
-                        ON r.id = u.id            
-            """)
+                        ON r.user_id = u.id
+                    {where}
+                    ORDER BY r.id, g.id
+            """, params)
                 
                     
                 
@@ -105,7 +123,8 @@ class UserGameList(View):
         
         # The context will be a dictionary that the template can access to show data
         context = {
-            "usergame_list": games_by_user
+            "usergame_list": add_versions(games_by_user, versions, blocks),
+            "page_obj": page
         }
 
         return render(request, template, context)
@@ -8,11 +8,18 @@
 #  3. Seeds the testing database with a GameType.
 #
 #  All FNs dealing with integration testing must start with " test_  "
+import json
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
-from levelupapi.models import Event, Gamer, Game
+from levelupapi.models import Event, Gamer, GamerStats, Game
 from levelupapi.views.event import EventSerializer
+from levelup.querycheck import QueryBudgetMixin
 from asyncio import events
 from urllib import request
 from django.http import HttpResponseServerError
@@ -21,7 +28,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 
 
-class GameTests(APITestCase):
+class GameTests(QueryBudgetMixin, APITestCase):
 
     # Add any fixtures you want to run to build the test database
     fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
@@ -31,6 +38,8 @@ class GameTests(APITestCase):
         self.gamer = Gamer.objects.first()
         token = Token.objects.get(user=self.gamer.user)
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        # cached detail responses would outlive the rolled back test data
+        cache.clear()
 
 
 
@@ -52,7 +61,8 @@ class GameTests(APITestCase):
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
 
-        self.assertEqual(expected.data, response.data)
+        # the gamer hasn't joined any, which the list adds to every event
+        self.assertEqual([dict(event, joined=False) for event in expected.data], response.data)
         
        
         
@@ -155,4 +165,221 @@ class GameTests(APITestCase):
         event.refresh_from_db()
 
         # assert that the updated value matches
-        self.assertEqual(updated_event['description'], event.description)
\ No newline at end of file
+        self.assertEqual(updated_event['description'], event.description)
+
+    def test_list_events_date_range(self):
+        """Test the from/to filters on the event list"""
+        url = '/events?from=2022-04-30&to=2022-04-30'
+
+        response = self.client.get(url)
+
+        # Only the second fixture event starts on 2022-04-30
+        expected = EventSerializer(Event.objects.filter(date='2022-04-30'), many=True)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([dict(event, joined=False) for event in expected.data], response.data)
+
+
+
+    def test_list_events_upcoming(self):
+        """Test that upcoming=true leaves out events that already started"""
+        event = Event.objects.first()
+        event.date = "2999-01-01"
+        event.save()
+
+        response = self.client.get('/events?upcoming=true')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([event.id], [e['id'] for e in response.data])
+
+
+
+    def test_list_events_bad_date(self):
+        """Test that an invalid date, organizer or game filter returns a 400"""
+        response = self.client.get('/events?from=yesterday')
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.get('/events?organizer=x')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.get('/events?game=one')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+
+    def test_list_joined_events(self):
+        """Test that joined=true only lists events the gamer signed up for"""
+        event = Event.objects.last()
+        event.attendees.add(self.gamer)
+
+        response = self.client.get('/events?joined=true')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([event.id], [e['id'] for e in response.data])
+
+
+
+    def test_signup_event(self):
+        """Test signing up for an event, twice"""
+        event = Event.objects.first()
+        url = f'/events/{event.id}/signup'
+        GamerStats.objects.create(gamer=self.gamer)
+
+        # one query to check the token, one to insert the signup, one to
+        # count it on the leaderboard, one to log it for /changes, plus the
+        # transaction around them
+        with self.assertNumQueries(6):
+            response = self.client.post(url)
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        # signing up again is harmless
+        response = self.client.post(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([self.gamer], list(event.attendees.all()))
+
+
+
+    def test_leave_event(self):
+        """Test leaving an event"""
+        event = Event.objects.first()
+        event.attendees.add(self.gamer)
+
+        # one DELETE, without reading the signup first
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/events/{event.id}/leave')
+
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertEqual([], list(event.attendees.all()))
+        statements = [query['sql'] for query in queries.captured_queries if 'levelupapi_eventgamer' in query['sql']]
+        self.assertEqual(1, len(statements))
+        self.assertTrue(statements[0].startswith('DELETE'))
+
+
+
+    # the tests run in one process, so the local memory cache counts as shared
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_get_event_cached(self):
+        """Test that a cached event shows signups and leaves right away"""
+        event = Event.objects.first()
+        url = f'/events/{event.id}'
+        self.assertEqual([], self.client.get(url).data['attendees'])
+
+        self.client.post(f'{url}/signup')
+        self.assertEqual([self.gamer.id], self.client.get(url).data['attendees'])
+
+        # only the token lookup is left
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        self.client.delete(f'{url}/leave')
+        self.assertEqual([], self.client.get(url).data['attendees'])
+
+        # the same event written another way shares the cache entry
+        self.assertEqual([], self.client.get(f'/events/0{event.id}').data['attendees'])
+        self.client.post(f'{url}/signup')
+        self.assertEqual([self.gamer.id], self.client.get(f'/events/0{event.id}').data['attendees'])
+
+
+
+    def test_signup_missing_event(self):
+        """Test that signing up for or leaving a missing event returns a 404"""
+        response = self.client.post('/events/478/signup')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.delete('/events/478/leave')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+
+
+    # the tests run in one process, so the local memory cache counts as shared
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_list_events_cached(self):
+        """Test that the shared listing is cached and 'joined' stays per gamer"""
+        event = Event.objects.first()
+        self.client.get('/events')
+
+        # only the token, the gamer and nothing else
+        with self.assertNumQueries(2):
+            response = self.client.get('/events')
+        self.assertEqual([False, False], [e['joined'] for e in response.data])
+
+        self.client.post(f'/events/{event.id}/signup')
+        response = self.client.get('/events')
+        listed = {e['id']: e for e in response.data}
+        self.assertTrue(listed[event.id]['joined'])
+        self.assertEqual([self.gamer.id], listed[event.id]['attendees'])
+
+        # another gamer sees the same events, without the signup as theirs
+        user = User.objects.create_user(username='other')
+        Gamer.objects.create(user=user, bio='Watcher')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        response = self.client.get('/events')
+        self.assertEqual([False, False], [e['joined'] for e in response.data])
+
+        self.client.delete(f'/events/{event.id}')
+        response = self.client.get('/events')
+        self.assertNotIn(event.id, [e['id'] for e in response.data])
+
+
+
+    def test_list_events_not_cached_per_process(self):
+        """Test that a process-local cache backend leaves the listing uncached"""
+        self.client.get('/events')
+
+        # the token, the gamer, the joined events, the events and their attendees
+        with self.assertNumQueries(5):
+            self.client.get('/events')
+
+
+
+    def test_stream_events(self):
+        """Test that the streaming mode sends the events in order, one per line"""
+        event = Event.objects.first()
+        for number in range(10):
+            Event.objects.create(description=f'Copy {number}', date='2022-05-01', time=f'{10 + number}:00',
+                                 game=event.game, organizer=event.organizer)
+        event.attendees.add(self.gamer)
+
+        # token, gamer, the gamer's signups, then the events and their attendees
+        with self.assertQueryBudget(total=5, repeats=1):
+            response = self.client.get('/events', HTTP_ACCEPT='application/x-ndjson')
+            lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(list(Event.objects.order_by('starts_at', 'id').values_list('id', flat=True)),
+                         [row['id'] for row in rows])
+        listed = {row['id']: row for row in rows}
+        self.assertEqual([self.gamer.id], listed[event.id]['attendees'])
+        self.assertTrue(listed[event.id]['joined'])
+
+
+
+    def test_list_events_by_ids(self):
+        """Test fetching several events at once, in the order asked for"""
+        event = Event.objects.first()
+        copy = Event.objects.create(description='Copy', date=event.date, time=event.time,
+                                    game=event.game, organizer=event.organizer)
+
+        response = self.client.get(f'/events?ids={copy.id},{event.id},478')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([copy.id, event.id], [e['id'] for e in response.data['results']])
+        self.assertEqual([478], response.data['missing'])
+
+
+
+    def test_list_events_query_budget(self):
+        """Test that listing events doesn't run a query per event"""
+        event = Event.objects.first()
+        for number in range(10):
+            Event.objects.create(description=f'Copy {number}', date=event.date, time=event.time,
+                                 game=event.game, organizer=event.organizer)
+
+        # token, gamer, events, their attendees and the gamer's signups
+        with self.assertQueryBudget(total=5, repeats=1):
+            response = self.client.get('/events')
+
+        self.assertEqual(12, len(response.data))
@@ -0,0 +1,79 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does two things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelup.admission import admission_counts
+from levelupapi.models import Gamer
+
+
+@override_settings(ADMISSION_CONTROL={
+    'events': {'prefixes': ['/events'], 'limit': 0, 'retry_after': 5},
+})
+class AdmissionTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+
+    def test_shed_request(self):
+        """Test that a request over the limit gets a 503 right away"""
+        shed = admission_counts()['shed'].get('events', 0)
+
+        response = self.client.get('/events')
+
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code)
+        self.assertEqual('5', response['Retry-After'])
+        self.assertEqual(shed + 1, admission_counts()['shed']['events'])
+
+
+
+    def test_other_routes_not_limited(self):
+        """Test that routes outside every class are not limited"""
+        response = self.client.get('/games')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+
+
+    def test_stats_need_staff(self):
+        """Test that only staff can read the admission counts"""
+        response = self.client.get('/stats/admission')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        self.gamer.user.is_staff = True
+        self.gamer.user.save()
+        response = self.client.get('/stats/admission')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+
+
+    @override_settings(ADMISSION_CONTROL={
+        'events': {'prefixes': ['/events'], 'limit': 1},
+    })
+    def test_streamed_response_holds_slot(self):
+        """Test that a streamed list keeps its slot until its body was sent"""
+        streamed = self.client.get('/events?stream=1')
+        self.assertEqual(status.HTTP_200_OK, streamed.status_code)
+
+        response = self.client.get('/events')
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code)
+
+        b''.join(streamed.streaming_content)
+        response = self.client.get('/events')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
@@ -0,0 +1,124 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does three things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#  3. Adds a past and a future event, both with the gamer signed up.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import io
+import json
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi import leaderboard
+from levelupapi.models import ArchivedEvent, ArchivedEventGamer, Change, Event, EventGamer, Game, Gamer, GamerStats
+
+
+class ArchiveTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        cache.clear()
+
+        game = Game.objects.first()
+        self.old = Event.objects.create(description='Old night', date='2001-01-05', time='19:00',
+                                        game=game, organizer=self.gamer)
+        self.new = Event.objects.create(description='New night', date='2999-01-05', time='19:00',
+                                        game=game, organizer=self.gamer)
+        self.old.attendees.add(self.gamer)
+        self.new.attendees.add(self.gamer)
+
+
+    def archive(self, before, batch_size=500):
+        output = io.StringIO()
+        call_command('archive_events', before=before, batch_size=batch_size, stdout=output)
+        return output.getvalue()
+
+
+
+    def test_archive_events(self):
+        """Test that past events and their signups move to the archive tables"""
+        moved = Event.objects.filter(starts_at__lt='2100-01-01').count()
+
+        output = self.archive('2100-01-01', batch_size=1)
+
+        self.assertIn(f'Archived {moved} event(s) in all', output)
+        self.assertEqual([self.new.id], list(Event.objects.values_list('id', flat=True)))
+        self.assertEqual(moved, ArchivedEvent.objects.count())
+        archived = ArchivedEvent.objects.get(pk=self.old.id)
+        self.assertEqual((self.old.description, self.old.starts_at), (archived.description, archived.starts_at))
+        self.assertEqual([self.gamer], list(archived.attendees.all()))
+        self.assertFalse(EventGamer.objects.filter(event_id=self.old.id).exists())
+        self.assertTrue(Change.objects.filter(model='event', object_id=self.old.id, action=Change.DELETE).exists())
+
+        # the leaderboard still counts archived events
+        leaderboard.rebuild()
+        stats = GamerStats.objects.get(gamer=self.gamer)
+        self.assertEqual(ArchivedEvent.objects.filter(organizer=self.gamer).count() + 1, stats.events_organized)
+        self.assertEqual(2, stats.events_joined)
+
+        with self.assertRaises(CommandError):
+            self.archive('last week')
+
+
+
+    def test_profile_counts_archived(self):
+        """Test that a profile counts archived events the same way the leaderboard does"""
+        before = self.client.get('/gamers/me').data
+
+        self.archive('2100-01-01')
+        leaderboard.rebuild()
+
+        response = self.client.get('/gamers/me')
+        stats = GamerStats.objects.get(gamer=self.gamer)
+        self.assertEqual(before['events_organized'], response.data['events_organized'])
+        self.assertEqual(2, response.data['events_joined'])
+        self.assertEqual((stats.events_organized, stats.events_joined),
+                         (response.data['events_organized'], response.data['events_joined']))
+
+
+
+    def test_list_include_archived(self):
+        """Test that archived events are only listed when asked for"""
+        self.archive('2100-01-01')
+
+        response = self.client.get('/events?joined=true')
+        self.assertEqual([self.new.id], [e['id'] for e in response.data])
+
+        response = self.client.get('/events?joined=true&include_archived=true')
+        self.assertEqual([self.old.id, self.new.id], [e['id'] for e in response.data])
+        self.assertEqual([self.gamer.id], response.data[0]['attendees'])
+
+        response = self.client.get('/events?joined=true&include_archived=true&stream=1')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([self.old.id, self.new.id], [json.loads(line)['id'] for line in lines])
+
+        response = self.client.get(f'/events?include_archived=true&ids={self.old.id},{self.new.id}')
+        self.assertEqual([self.old.id, self.new.id], [e['id'] for e in response.data['results']])
+
+        response = self.client.get(f'/events/{self.old.id}')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+
+    def test_delete_game_with_archived_events(self):
+        """Test that deleting a game removes its archived events too"""
+        self.archive('2100-01-01')
+
+        response = self.client.delete(f'/games/{self.old.game_id}')
+
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertFalse(ArchivedEvent.objects.filter(game_id=self.old.game_id).exists())
+        self.assertFalse(ArchivedEventGamer.objects.filter(event_id=self.old.id).exists())
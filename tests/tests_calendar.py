@@ -0,0 +1,109 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does two things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, Gamer
+
+
+class CalendarTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+    def feed_url(self):
+        response = self.client.get('/events/calendar')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return response.data['url'].replace('http://testserver', '')
+
+
+
+    def test_calendar_feed(self):
+        """Test that the feed lists the gamer's events"""
+        url = self.feed_url()
+
+        # the feed needs no login token, only the one in its URL
+        self.client.credentials()
+        response = self.client.get(url)
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('DTSTART:20220429T180000Z\r\n', body)
+        self.assertEqual(2, body.count('BEGIN:VEVENT'))
+
+
+
+    def test_calendar_not_modified(self):
+        """Test that polling an unchanged feed gets a 304, until an event changes"""
+        url = self.feed_url()
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        event = Event.objects.first()
+        event.description = 'Changed'
+        event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+
+
+    def test_calendar_game_renamed(self):
+        """Test that renaming the game of a listed event changes the feed's ETag"""
+        url = self.feed_url()
+        etag = self.client.get(url)['ETag']
+
+        game = Event.objects.first().game
+        game.title = 'Renamed'
+        game.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn('SUMMARY:Renamed', b''.join(response.streaming_content).decode())
+
+
+
+    def test_calendar_other_events_changed(self):
+        """Test that changes to events outside the feed keep the 304, a deleted one doesn't"""
+        event = Event.objects.first()
+        user = User.objects.create_user(username='other')
+        other = Event.objects.create(description='Not mine', date=event.date, time=event.time,
+                                     game=event.game, organizer=Gamer.objects.create(user=user, bio='Other'))
+        url = self.feed_url()
+        etag = self.client.get(url)['ETag']
+
+        other.description = 'Still not mine'
+        other.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        self.client.delete(f'/events/{event.id}')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+
+
+    def test_calendar_reset(self):
+        """Test that resetting the token retires the old feed URL"""
+        old_url = self.feed_url()
+        self.client.get('/events/calendar?reset=true')
+
+        self.client.credentials()
+        response = self.client.get(old_url)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
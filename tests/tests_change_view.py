@@ -0,0 +1,91 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does two things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Change, Event, Game, Gamer
+
+
+class ChangeTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+
+    def test_list_changes(self):
+        """Test that creates, updates and deletes show up in the feed"""
+        game = Game.objects.first()
+        game.title = f'{game.title} updated'
+        game.save()
+
+        event = Event.objects.first()
+        self.client.delete(f'/events/{event.id}')
+
+        response = self.client.get('/changes')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [('game', game.id, 'update'), ('event', event.id, 'delete')],
+            [(c['model'], c['object_id'], c['action']) for c in response.data['changes']]
+        )
+        self.assertEqual(Change.objects.last().id, response.data['next_since'])
+
+
+
+    def test_list_changes_since(self):
+        """Test that only changes after 'since' are returned"""
+        game = Game.objects.first()
+        game.save()
+        since = Change.objects.last().id
+        game.delete()
+
+        response = self.client.get(f'/changes?since={since}&limit=1')
+
+        # the game's event is deleted by the cascade before the game itself
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [('event', 'delete')],
+            [(c['model'], c['action']) for c in response.data['changes']]
+        )
+
+        response = self.client.get(f'/changes?since={response.data["next_since"]}')
+        self.assertEqual(
+            [('game', 'delete')],
+            [(c['model'], c['action']) for c in response.data['changes']]
+        )
+
+        # a client that is up to date gets nothing back
+        response = self.client.get(f'/changes?since={response.data["next_since"]}')
+        self.assertEqual([], list(response.data['changes']))
+
+
+
+    def test_attendance_changes(self):
+        """Test that joining and leaving an event show up as updates of it"""
+        event = Event.objects.first()
+        since = Change.objects.order_by('id').values_list('id', flat=True).last() or 0
+
+        self.client.post(f'/events/{event.id}/signup')
+        # signing up twice changes nothing the second time
+        self.client.post(f'/events/{event.id}/signup')
+        self.client.delete(f'/events/{event.id}/leave')
+
+        response = self.client.get(f'/changes?since={since}')
+        self.assertEqual(
+            [('event', event.id, 'update'), ('event', event.id, 'update')],
+            [(c['model'], c['object_id'], c['action']) for c in response.data['changes']]
+        )
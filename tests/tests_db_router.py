@@ -0,0 +1,105 @@
+#
+# These tests check where the database router sends reads. They don't need
+# any fixtures, since no query is run: the 'replica' alias is only a name,
+# and its health check result is filled in by setUp().
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import time
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from levelup import db_router
+from levelupapi.models import Game
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        # Pretend the replica just passed its health check
+        db_router._health['replica'] = (True, time.monotonic())
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def tearDown(self):
+        db_router._health.clear()
+
+
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test that reads default to the primary, e.g. in management commands"""
+        self.assertEqual('default', self.router.db_for_read(Game))
+
+
+
+    def test_safe_reads_use_replica(self):
+        """Test that reads inside use_replicas() go to the replica"""
+        with db_router.use_replicas():
+            self.assertEqual('replica', self.router.db_for_read(Game))
+            self.assertEqual('default', self.router.db_for_write(Game))
+
+
+
+    def test_replica_down_uses_primary(self):
+        """Test that a replica that failed its health check is skipped"""
+        db_router._health['replica'] = (False, time.monotonic())
+
+        with db_router.use_replicas():
+            self.assertEqual('default', self.router.db_for_read(Game))
+
+
+
+    def read_from(self, request):
+        """The database the request read from, and its response"""
+        middleware = db_router.ReplicaMiddleware(lambda request: HttpResponse(self.router.db_for_read(Game)))
+        response = middleware(request)
+        return response.content.decode(), response
+
+
+
+    # the tests run in one process, so the local memory cache counts as shared
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_reads_after_write_use_primary(self):
+        """Test that a client reads from the primary right after it wrote"""
+        headers = {'HTTP_AUTHORIZATION': 'Token abc'}
+
+        self.assertEqual('replica', self.read_from(self.factory.get('/games', **headers))[0])
+        self.assertEqual('default', self.read_from(self.factory.post('/games', **headers))[0])
+        self.assertEqual('default', self.read_from(self.factory.get('/games', **headers))[0])
+
+        # another client is not pinned
+        other = {'HTTP_AUTHORIZATION': 'Token xyz'}
+        self.assertEqual('replica', self.read_from(self.factory.get('/games', **other))[0])
+
+
+
+    def test_pin_cookie_without_shared_cache(self):
+        """Test that a process-local cache pins the client with a signed cookie instead"""
+        _, response = self.read_from(self.factory.post('/games'))
+        cookie = response.cookies[db_router.PIN_COOKIE].value
+
+        # nothing was kept in this process' cache
+        self.assertEqual('replica', self.read_from(self.factory.get('/games'))[0])
+
+        request = self.factory.get('/games')
+        request.COOKIES[db_router.PIN_COOKIE] = cookie
+        self.assertEqual('default', self.read_from(request)[0])
+
+        # a cookie the client made up is ignored
+        request = self.factory.get('/games')
+        request.COOKIES[db_router.PIN_COOKIE] = '1'
+        self.assertEqual('replica', self.read_from(request)[0])
+
+
+
+    def test_streamed_body_reads_use_replica(self):
+        """Test that a streamed body made after the middleware returned still reads from the replica"""
+        def view(request):
+            return StreamingHttpResponse(
+                self.router.db_for_read(Game) for _ in range(1))
+        middleware = db_router.ReplicaMiddleware(view)
+
+        response = middleware(self.factory.get('/games'))
+
+        self.assertEqual(b'replica', b''.join(response.streaming_content))
@@ -8,14 +8,21 @@
 #  3. Seeds the testing database with a GameType.
 #
 #  All FNs dealing with integration testing must start with " test_  "
+import json
+import logging
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
-from levelupapi.models import Game, Gamer
+from levelupapi import cascade, detail_cache
+from levelupapi.models import Change, Event, EventGamer, Game, Gamer
 from levelupapi.views.game import GameSerializer, CreateGameSerializer
+from levelup.querycheck import QueryBudgetMixin, QueryCheckMiddleware
 
 
-class GameTests(APITestCase):
+class GameTests(QueryBudgetMixin, APITestCase):
 
     # Add any fixtures you want to run to build the test database
     fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
@@ -25,6 +32,8 @@ class GameTests(APITestCase):
         self.gamer = Gamer.objects.first()
         token = Token.objects.get(user=self.gamer.user)
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        # cached detail responses would outlive the rolled back test data
+        cache.clear()
 
 
 
@@ -82,9 +91,71 @@ class GameTests(APITestCase):
 
         # Assert that the response matches the expected return data
         self.assertEqual(expected.data, response.data)
+
+
+
+    # the tests run in one process, so the local memory cache counts as shared
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_get_game_cached(self):
+        """Test that a game is served from cache until it or its game type changes"""
+        game = Game.objects.first()
+        url = f'/games/{game.id}'
+        self.client.get(url)
+
+        # only the token lookup is left
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(game.title, response.data['title'])
+
+        game.game_type.label = 'Renamed type'
+        game.game_type.save()
+        response = self.client.get(url)
+        self.assertEqual('Renamed type', response.data['game_type']['label'])
+
+        self.client.put(url, {
+            'title': 'Renamed game', 'maker': game.maker, 'skill_level': game.skill_level,
+            'number_of_players': game.number_of_players, 'game_type': game.game_type_id
+        }, format='json')
+        response = self.client.get(url)
+        self.assertEqual('Renamed game', response.data['title'])
         
         
         
+    def test_list_games_by_ids(self):
+        """Test fetching several games at once, in the order asked for"""
+        first, second = Game.objects.order_by('id')[:2]
+
+        # token, games, and the users' groups and permissions
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/games?ids={second.id},478,{first.id},{second.id}')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([second.id, first.id], [g['id'] for g in response.data['results']])
+        self.assertEqual([478], response.data['missing'])
+
+        response = self.client.get('/games?ids=1,two')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.get('/games?ids=' + ','.join(str(n) for n in range(101)))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+
+    def test_stream_games(self):
+        """Test that the streaming mode sends one game per line"""
+        expected = GameSerializer(Game.objects.all(), many=True).data
+
+        response = self.client.get('/games?stream=1')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(json.dumps(expected)), [json.loads(line) for line in lines])
+
+        response = self.client.get('/games', HTTP_ACCEPT='application/x-ndjson')
+        self.assertTrue(response.streaming)
+
+
+
     def test_list_games(self):
         """Test list games"""
         url = '/games'
@@ -140,3 +211,104 @@ class GameTests(APITestCase):
         # The response should return a 404
         response = self.client.get(url)
         self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.delete(url)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+
+    def test_delete_game_with_events(self):
+        """Test that deleting a game cascades without a query per event"""
+        game = Game.objects.first()
+        for number in range(10):
+            event = Event.objects.create(description=f'Night {number}', date='2022-06-01',
+                                         time='19:00', game=game, organizer=self.gamer)
+            event.attendees.add(self.gamer)
+        event_ids = list(Event.objects.filter(game=game).values_list('id', flat=True))
+        last_change = Change.objects.order_by('-id').values_list('id', flat=True).first()
+
+        with self.assertQueryBudget(total=22, repeats=1):
+            response = self.client.delete(f'/games/{game.id}')
+
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertFalse(Event.objects.filter(id__in=event_ids).exists())
+        self.assertFalse(EventGamer.objects.filter(event_id__in=event_ids).exists())
+
+        # the change log still hears about every row that went
+        deletes = Change.objects.filter(id__gt=last_change, action=Change.DELETE)
+        self.assertEqual(sorted(event_ids), sorted(deletes.filter(model='event').values_list('object_id', flat=True)))
+        self.assertEqual([game.id], list(deletes.filter(model='game').values_list('object_id', flat=True)))
+
+
+
+    def test_delete_game_forgets_cache_on_commit(self):
+        """Test that detail entries cached again before the delete commits are dropped after it"""
+        game = Game.objects.first()
+        event = Event.objects.filter(game=game).first()
+        stale = {'id': game.id}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cascade.delete_game(game.id)
+            # a retrieve that read the rows before the commit caches them again
+            cache.set(detail_cache.key('game', game.id), stale)
+            cache.set(detail_cache.key('event', event.id), stale)
+
+        self.assertIsNone(cache.get(detail_cache.key('game', game.id)))
+        self.assertIsNone(cache.get(detail_cache.key('event', event.id)))
+
+
+
+    def test_search_games(self):
+        """Test searching games by the start of a word in the title or maker"""
+        response = self.client.get('/games?search=parker bro')
+
+        expected = GameSerializer(Game.objects.filter(title='Monopoly'), many=True)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected.data, response.data)
+
+
+    def test_search_games_after_change(self):
+        """Test that the search index follows updates to a game"""
+        game = Game.objects.first()
+        game.title = 'Zelda'
+        game.save()
+
+        response = self.client.get('/games?search=zel')
+        self.assertEqual([game.id], [g['id'] for g in response.data])
+
+        response = self.client.get('/games?search="donkey')
+        self.assertEqual([], response.data)
+
+
+    def test_list_games_query_budget(self):
+        """Test that listing games doesn't run a query per game"""
+        game = Game.objects.first()
+        for number in range(10):
+            Game.objects.create(title=f'Copy {number}', maker=game.maker, gamer=game.gamer,
+                                game_type=game.game_type, number_of_players=2, skill_level=1)
+
+        # the token, the games, and the gamers' groups and permissions
+        with self.assertQueryBudget(total=4, repeats=1):
+            response = self.client.get('/games')
+
+        self.assertEqual(Game.objects.count(), len(response.data))
+
+
+
+    def test_query_check_covers_streamed_body(self):
+        """Test that an N+1 made while a streamed body is sent is still logged"""
+        def view(request):
+            # one game type query per game, made only while the body is read
+            return StreamingHttpResponse(
+                game.game_type.label for game in Game.objects.all())
+        middleware = QueryCheckMiddleware(view)
+        for number in range(5):
+            Game.objects.create(title=f'Copy {number}', maker='Copy', gamer=self.gamer,
+                                game_type_id=1, number_of_players=2, skill_level=1)
+
+        with self.assertLogs('levelup.queries', logging.WARNING) as logs:
+            response = middleware(RequestFactory().get('/games'))
+            b''.join(response.streaming_content)
+
+        self.assertIn('Possible N+1 in GET /games', logs.output[0])
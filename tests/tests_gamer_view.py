@@ -0,0 +1,65 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does two things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, Game, Gamer
+
+
+class GamerTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+
+    def test_my_profile(self):
+        """Test that a profile counts games, organized and joined events in one query"""
+        Event.objects.first().attendees.add(self.gamer)
+
+        # one query to check the token, one for the profile
+        with self.assertNumQueries(2):
+            response = self.client.get('/gamers/me')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({
+            'id': self.gamer.id,
+            'full_name': self.gamer.user.get_full_name(),
+            'bio': self.gamer.bio,
+            'games_owned': Game.objects.filter(gamer=self.gamer).count(),
+            'events_organized': Event.objects.filter(organizer=self.gamer).count(),
+            'events_joined': 1
+        }, response.data)
+
+
+
+    def test_get_gamer(self):
+        """Test getting another gamer's profile, and a missing one"""
+        user = User.objects.create_user(username='other', first_name='Other', last_name='Gamer')
+        other = Gamer.objects.create(user=user, bio='Just here to watch')
+
+        response = self.client.get(f'/gamers/{other.id}')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('Other Gamer', response.data['full_name'])
+        self.assertEqual(other.bio, response.data['bio'])
+        self.assertEqual(0, response.data['events_joined'])
+
+        response = self.client.get('/gamers/478')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.get('/gamers/abc')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
@@ -0,0 +1,85 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does three things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#  3. Counts the fixture events into the leaderboard stats.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import io
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, Game, Gamer
+
+
+class LeaderboardTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        call_command('rebuild_leaderboard', stdout=io.StringIO())
+
+
+    def board(self, by):
+        response = self.client.get(f'/leaderboard?by={by}')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [(row['gamer_id'], row['count']) for row in response.data]
+
+
+
+    def test_organizers_board(self):
+        """Test that creating and deleting events moves the organizer count"""
+        self.assertEqual([(self.gamer.id, 2)], self.board('organizers'))
+
+        self.client.post('/events', {
+            "description": "Another one",
+            "date": "2022-05-26",
+            "time": "16:00:00",
+            "game_id": 1
+        }, format='json')
+        self.assertEqual([(self.gamer.id, 3)], self.board('organizers'))
+
+        self.client.delete(f'/games/{Game.objects.first().id}')
+        self.assertEqual([(self.gamer.id, 1)], self.board('organizers'))
+
+
+
+    def test_attendees_board(self):
+        """Test that signing up and leaving moves the attendee count"""
+        event = Event.objects.first()
+
+        self.client.post(f'/events/{event.id}/signup')
+        self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual([(self.gamer.id, 1)], self.board('attendees'))
+
+        self.client.delete(f'/events/{event.id}/leave')
+        self.assertEqual([], self.board('attendees'))
+
+
+
+    def test_bad_board(self):
+        """Test that an unknown board returns a 400"""
+        response = self.client.get('/leaderboard?by=nobody')
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+
+    def test_bad_limit(self):
+        """Test that a limit out of range is clamped, and one that isn't a number returns a 400"""
+        for limit in ('-1', '0'):
+            response = self.client.get(f'/leaderboard?limit={limit}')
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertEqual(1, len(response.data))
+
+        response = self.client.get('/leaderboard?limit=ten')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
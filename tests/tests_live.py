@@ -0,0 +1,105 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does two things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import asyncio
+from asgiref.sync import async_to_sync, sync_to_async
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi import live
+from levelupapi.models import Event, Gamer
+
+
+class LiveTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        self.token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+
+    def stream(self, path, action, headers=()):
+        """Open a stream on 'path', run 'action', then disconnect
+
+        Returns the status code, the body that was streamed and the headers.
+        """
+        async def run():
+            sent = []
+            inbox = asyncio.Queue()
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {
+                'type': 'http',
+                'path': path,
+                'query_string': f'token={self.token.key}'.encode(),
+                'headers': list(headers)
+            }
+            stream = asyncio.ensure_future(live.sse_application(scope, inbox.get, send))
+            while not sent and not stream.done():
+                await asyncio.sleep(0.01)
+            await sync_to_async(action)()
+            await asyncio.sleep(0.01)
+            await inbox.put({'type': 'http.disconnect'})
+            await stream
+            return sent
+
+        sent = async_to_sync(run)()
+        return sent[0]['status'], b''.join(m.get('body', b'') for m in sent[1:]), dict(sent[0]['headers'])
+
+
+
+    def test_stream_event_signup(self):
+        """Test that a signup is pushed to the streams for the event and its game"""
+        event = Event.objects.first()
+        signup = lambda: self.client.post(f'/events/{event.id}/signup')
+
+        status_code, body, _ = self.stream(f'/stream/events/{event.id}', signup)
+        self.assertEqual(200, status_code)
+        self.assertIn(b'event: signup', body)
+
+        self.client.delete(f'/events/{event.id}/leave')
+        status_code, body, _ = self.stream(f'/stream/games/{event.game_id}', signup)
+        self.assertIn(b'event: signup', body)
+        self.assertFalse(live.broker.has_subscribers())
+
+
+
+    def test_stream_needs_token(self):
+        """Test that a stream without a valid token is refused"""
+        self.token.key = 'not-a-token'
+        status_code, _, _ = self.stream('/stream/events/1', lambda: None)
+
+        self.assertEqual(401, status_code)
+
+
+
+    def test_stream_cors(self):
+        """Test that the React client's origin may open a stream, and others may not"""
+        _, _, headers = self.stream('/stream/events/1', lambda: None, [(b'origin', b'http://localhost:3000')])
+        self.assertEqual(b'http://localhost:3000', headers[b'access-control-allow-origin'])
+
+        _, _, headers = self.stream('/stream/events/1', lambda: None, [(b'origin', b'http://evil.example')])
+        self.assertNotIn(b'access-control-allow-origin', headers)
+
+
+
+    def test_slow_stream_is_closed(self):
+        """Test that a client that stops reading is disconnected"""
+        async def run():
+            subscriber = live.Subscriber(asyncio.get_running_loop())
+            for _ in range(live.QUEUE_SIZE + 1):
+                subscriber.put(b'data: {}\n\n')
+            return await subscriber.queue.get()
+
+        self.assertIs(live.CLOSE, async_to_sync(run)())
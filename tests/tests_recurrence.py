@@ -0,0 +1,209 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does four things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#  3. Adds an event on Thursday 2022-06-02 that repeats every week.
+#  4. Clears the cached event listings.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import datetime
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi import recurrence
+from levelupapi.models import Event, EventRecurrence, Game, Gamer, OccurrenceSignup
+
+
+class RecurrenceTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        self.event = Event.objects.create(description='Game night', date='2022-06-02', time='19:00',
+                                          game=Game.objects.first(), organizer=self.gamer)
+        self.url = f'/events/{self.event.id}'
+        response = self.client.put(f'{self.url}/recurrence', {'frequency': 'weekly'}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        cache.clear()
+
+
+    def days(self, query):
+        response = self.client.get(f'{self.url}/occurrences?{query}')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [str(occurrence['date']) for occurrence in response.data]
+
+
+
+    def test_occurrences_in_window(self):
+        """Test that only the occurrences in the window are listed, years in"""
+        self.assertEqual(['2022-06-02', '2022-06-09'], self.days('from=2022-05-01&to=2022-06-09'))
+        self.assertEqual(['2032-06-03', '2032-06-10'], self.days('from=2032-06-01&to=2032-06-12'))
+
+        self.client.put(f'{self.url}/recurrence', {'frequency': 'weekly', 'interval': 2, 'until': '2022-06-30'},
+                        format='json')
+        self.assertEqual(['2022-06-02', '2022-06-16', '2022-06-30'], self.days('from=2022-06-01&to=2022-07-31'))
+
+        # the series is still one row
+        self.assertEqual(1, Event.objects.filter(description='Game night').count())
+
+        response = self.client.get(f'{self.url}/occurrences?from=2022-01-01&to=2024-01-01')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+
+    def test_monthly_skips_missing_days(self):
+        """Test that a monthly rule on the 31st skips the shorter months"""
+        self.event.date = '2022-01-31'
+        self.event.save()
+        EventRecurrence.objects.filter(event=self.event).update(frequency=EventRecurrence.MONTHLY)
+
+        self.assertEqual(['2022-01-31', '2022-03-31', '2022-05-31'], self.days('from=2022-01-01&to=2022-06-30'))
+
+
+
+    def test_cancel_and_move_occurrence(self):
+        """Test that exceptions cancel or move single occurrences"""
+        response = self.client.put(f'{self.url}/occurrences/2022-06-09', {'cancelled': True}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.client.put(f'{self.url}/occurrences/2022-06-16', {'starts_at': '2022-06-17T20:00:00Z'}, format='json')
+
+        response = self.client.get(f'{self.url}/occurrences?from=2022-06-01&to=2022-06-20')
+        self.assertEqual(['2022-06-02', '2022-06-16'], [str(o['date']) for o in response.data])
+        self.assertEqual(datetime.datetime(2022, 6, 17, 20, tzinfo=datetime.timezone.utc),
+                         response.data[1]['starts_at'])
+
+        # a day the rule doesn't fall on can't be changed
+        response = self.client.put(f'{self.url}/occurrences/2022-06-10', {'cancelled': True}, format='json')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        self.client.delete(f'{self.url}/occurrences/2022-06-09')
+        self.assertEqual(['2022-06-02', '2022-06-09'], self.days('from=2022-06-01&to=2022-06-09'))
+
+
+
+    def test_signup_for_one_occurrence(self):
+        """Test signing up for and leaving a single occurrence"""
+        response = self.client.post(f'{self.url}/occurrences/2022-06-09/signup')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        response = self.client.post(f'{self.url}/occurrences/2022-06-09/signup')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        response = self.client.get(f'{self.url}/occurrences?from=2022-06-01&to=2022-06-09')
+        self.assertEqual([[], [self.gamer.id]], [o['attendees'] for o in response.data])
+
+        response = self.client.post(f'{self.url}/occurrences/2022-06-10/signup')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.delete(f'{self.url}/occurrences/2022-06-09/leave')
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertFalse(OccurrenceSignup.objects.exists())
+
+        # deleting the series takes its occurrence data along
+        self.client.post(f'{self.url}/occurrences/2022-06-16/signup')
+        self.client.delete(self.url)
+        self.assertFalse(EventRecurrence.objects.exists())
+        self.assertFalse(OccurrenceSignup.objects.exists())
+
+
+
+    def test_list_expands_series(self):
+        """Test that /events lists every occurrence of a series in the asked window"""
+        self.client.put(f'{self.url}/occurrences/2022-06-09', {'cancelled': True}, format='json')
+        self.client.put(f'{self.url}/occurrences/2022-06-16', {'starts_at': '2022-06-17T20:00:00Z'}, format='json')
+        self.client.post(f'{self.url}/occurrences/2022-06-23/signup')
+
+        response = self.client.get('/events?from=2022-06-01&to=2022-06-30')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        rows = [row for row in response.data if row['id'] == self.event.id]
+        self.assertEqual(['2022-06-02', '2022-06-16', '2022-06-23', '2022-06-30'],
+                         [row['occurrence'] for row in rows])
+        self.assertEqual(('2022-06-17', '20:00:00'), (rows[1]['date'], rows[1]['time']))
+        self.assertEqual([False, False, True, False], [row['joined'] for row in rows])
+
+        # the listing stays in order, with one-off events in between
+        self.assertEqual(sorted(response.data, key=lambda row: (row['date'], row['time'], row['id'])),
+                         response.data)
+
+        # the cached listing is retired when an occurrence changes
+        self.client.put(f'{self.url}/occurrences/2022-06-30', {'cancelled': True}, format='json')
+        response = self.client.get('/events?from=2022-06-01&to=2022-06-30')
+        self.assertEqual(3, len([row for row in response.data if row['id'] == self.event.id]))
+
+        # a window without the series' occurrences leaves it out
+        response = self.client.get('/events?from=2022-05-01&to=2022-05-31')
+        self.assertNotIn(self.event.id, [row['id'] for row in response.data])
+
+        response = self.client.get('/events?from=2022-01-01&to=2024-01-01')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+
+    def test_calendar_feed_repeats(self):
+        """Test that the calendar feed has the rule, cancelled and moved occurrences"""
+        self.client.put(f'{self.url}/recurrence', {'frequency': 'weekly', 'interval': 2, 'until': '2022-12-31'},
+                        format='json')
+        url = self.client.get('/events/calendar').data['url'].replace('http://testserver', '')
+        etag = self.client.get(url)['ETag']
+
+        self.client.put(f'{self.url}/occurrences/2022-06-16', {'cancelled': True}, format='json')
+        self.client.put(f'{self.url}/occurrences/2022-06-30', {'starts_at': '2022-07-01T20:00:00Z'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertIn('RRULE:FREQ=WEEKLY;INTERVAL=2;UNTIL=20221231T235959Z\r\n', body)
+        self.assertIn('EXDATE:20220616T190000Z\r\n', body)
+        self.assertIn('RECURRENCE-ID:20220630T190000Z\r\n', body)
+        self.assertIn('DTSTART:20220701T200000Z\r\n', body)
+        self.assertEqual(2, body.count(f'UID:event-{self.event.id}@levelup'))
+
+
+
+    def test_calendar_feed_single_occurrence(self):
+        """Test that a signup for one occurrence puts just that one in the feed"""
+        other = Gamer.objects.create(user=User.objects.create_user('other', password='x'), bio='')
+        self.event.organizer = other
+        self.event.save()
+        self.client.post(f'{self.url}/occurrences/2022-06-09/signup')
+
+        url = self.client.get('/events/calendar').data['url'].replace('http://testserver', '')
+        body = b''.join(self.client.get(url).streaming_content).decode()
+
+        self.assertIn(f'UID:event-{self.event.id}-20220609@levelup\r\n', body)
+        self.assertIn('DTSTART:20220609T190000Z\r\n', body)
+        self.assertNotIn('RRULE', body)
+
+
+
+    def test_impossible_day(self):
+        """Test that a day that doesn't exist, like February 30th, is a 404"""
+        response = self.client.put(f'{self.url}/occurrences/2022-02-30', {'cancelled': True}, format='json')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.post(f'{self.url}/occurrences/2022-02-30/signup')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.delete(f'{self.url}/occurrences/2022-02-30/leave')
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+
+
+
+    def test_one_off_event(self):
+        """Test that an event without a rule has a single occurrence"""
+        event = Event.objects.exclude(pk=self.event.pk).first()
+        start = datetime.datetime.combine(event.date, datetime.time(), tzinfo=datetime.timezone.utc)
+
+        listing = list(recurrence.occurrences(event, start - recurrence.MAX_WINDOW, start + recurrence.MAX_WINDOW))
+
+        self.assertEqual([recurrence.Occurrence(event.date, event.starts_at)], listing)
@@ -0,0 +1,153 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does three things:
+#
+#  1. Grabs a Gamer from the fixtures in the testing database.
+#  2. Adds their authentication Token to the request headers.
+#  3. Points the report job files at a temporary directory.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, Gamer
+from levelupapi.tasks import run_pending
+from levelupreports import jobs
+from levelupreports.models import ReportJob
+
+
+class ReportJobTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        job_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(job_dir.cleanup)
+        settings = override_settings(REPORT_JOB_DIR=job_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+    def run_job(self, body):
+        response = self.client.post('/reports/jobs', body, format='json')
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+        self.assertEqual('pending', response.data['status'])
+        run_pending()
+        return self.client.get(f"/reports/jobs/{response.data['id']}")
+
+
+    def download(self, job):
+        response = self.client.get(f"/reports/jobs/{job['id']}/download")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return gzip.decompress(b''.join(response.streaming_content)).decode()
+
+
+
+    def test_csv_report_job(self):
+        """Test that a job writes the events report to a gzipped CSV file"""
+        response = self.run_job({'report': 'events', 'format': 'csv'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('done', response.data['status'])
+        self.assertEqual(100, response.data['progress'])
+        self.assertEqual(Event.objects.count(), response.data['rows_written'])
+
+        rows = list(csv.DictReader(io.StringIO(self.download(response.data))))
+        self.assertEqual(sorted(Event.objects.values_list('description', flat=True)),
+                         sorted(row['description'] for row in rows))
+
+
+
+    def test_ndjson_report_job(self):
+        """Test a job writing an analytics report as newline delimited JSON"""
+        response = self.run_job({'report': 'attendancebyskill', 'format': 'ndjson'})
+
+        lines = self.download(response.data).splitlines()
+        self.assertEqual(response.data['rows_written'], len(lines))
+        self.assertIn('average_attendance', json.loads(lines[0]))
+
+
+
+    def test_report_job_errors(self):
+        """Test bad jobs, unfinished jobs and other users' jobs"""
+        response = self.client.post('/reports/jobs', {'report': 'everything'}, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.post('/reports/jobs', {'report': 'events', 'params': {'game': 'one'}},
+                                    format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.post('/reports/jobs', {'report': 'events'}, format='json')
+        job_id = response.data['id']
+        response = self.client.get(f'/reports/jobs/{job_id}/download')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        other = User.objects.create_user(username='other')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=other).key}")
+        response = self.client.get(f'/reports/jobs/{job_id}')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+
+    def test_report_job_params(self):
+        """Test that params must be an object and limits keep to the report's bounds"""
+        response = self.client.post('/reports/jobs', {'report': 'events', 'params': [1]}, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.post('/reports/jobs', {'report': 'populargames', 'params': {'limit': 0}},
+                                    format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.post('/reports/jobs', {'report': 'populargames', 'params': {'limit': 5000}},
+                                    format='json')
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+        self.assertEqual(100, response.data['params']['limit'])
+
+
+
+    def test_expire_report_jobs(self):
+        """Test that finished jobs are deleted with their files once they are old enough"""
+        job = self.run_job({'report': 'events', 'format': 'csv'}).data
+        path = jobs.job_path(ReportJob.objects.get(pk=job['id']))
+        self.assertTrue(os.path.exists(path))
+
+        self.assertEqual(0, jobs.expire_jobs())
+
+        later = timezone.now() + datetime.timedelta(days=8)
+        self.assertEqual(1, jobs.expire_jobs(now=later))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ReportJob.objects.filter(pk=job['id']).exists())
+
+
+
+    def test_fail_stale_report_jobs(self):
+        """Test that a job that never finished is failed, and stays failed"""
+        response = self.client.post('/reports/jobs', {'report': 'events'}, format='json')
+        job_id = response.data['id']
+        ReportJob.objects.filter(pk=job_id).update(created_on=timezone.now() - datetime.timedelta(hours=2))
+
+        call_command('cleanup_report_jobs', stdout=io.StringIO())
+
+        # the worker gets to it late, and leaves it alone
+        run_pending()
+        response = self.client.get(f'/reports/jobs/{job_id}')
+        self.assertEqual('failed', response.data['status'])
+        self.assertIsNone(response.data['download'])
+        self.assertEqual([], os.listdir(jobs.job_dir()))
@@ -0,0 +1,128 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# The report views are plain Django views without token authentication,
+# so the set up FN only clears the cached report fragments.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.models import Event, Game, Gamer
+
+
+class ReportTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        cache.clear()
+
+
+
+    def test_user_games_report(self):
+        """Test that the games report shows a change to a cached gamer block"""
+        response = self.client.get('/reports/usergames')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(response, 'Title: Donkey Kong')
+
+        game = Game.objects.get(title='Donkey Kong')
+        game.title = 'Donkey Kong Jr'
+        game.save()
+
+        response = self.client.get('/reports/usergames')
+        self.assertContains(response, 'Title: Donkey Kong Jr')
+
+
+
+    def test_cached_blocks_skip_report_query(self):
+        """Test that gamers with a cached block are left out of the report query"""
+        self.client.get('/reports/usergames')
+
+        # the report versions, then the report query for no gamers at all
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get('/reports/usergames')
+        self.assertContains(response, 'Title: Donkey Kong')
+        self.assertIn('WHERE 0 = 1', queries.captured_queries[1]['sql'])
+
+        # a renamed user gets their block built again
+        user = Gamer.objects.first().user
+        user.first_name = 'Renamed'
+        user.save()
+        response = self.client.get('/reports/usergames')
+        self.assertContains(response, 'Renamed')
+
+
+
+    def test_user_events_report(self):
+        """Test the events report"""
+        response = self.client.get('/reports/userevents')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(response, 'Description: Fun for the family')
+
+
+
+    def test_one_gamer_report(self):
+        """Test the games report for a single gamer"""
+        response = self.client.get('/reports/usergames/1')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(response, 'Carrie Belk')
+
+        response = self.client.get('/reports/userevents/478')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+
+    def test_paginated_report(self):
+        """Test that ?page= shows one page of gamers with page links"""
+        response = self.client.get('/reports/userevents?page=1')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(response, 'Page 1 of 1')
+        self.assertContains(response, 'Description: Fun for the family')
+
+
+
+    def test_popular_games_report(self):
+        """Test that the most attended games report ranks by signups, from cache"""
+        event = Event.objects.get(description='Gaming with adult beverages')
+        event.attendees.add(Gamer.objects.first())
+
+        # one grouped query, then served from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get('/reports/populargames?limit=5')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(event.game_id, response.context['game_list'][0]['id'])
+        self.assertEqual(1, response.context['game_list'][0]['attendance'])
+
+        with self.assertNumQueries(0):
+            self.client.get('/reports/populargames?limit=5')
+
+        # a limit below 1 shows a single game
+        response = self.client.get('/reports/populargames?limit=-1')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.context['game_list']))
+
+
+
+    def test_events_by_month_report(self):
+        """Test the events per game type per month report"""
+        response = self.client.get('/reports/eventsbymonth?year=2022')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(response, 'April 2022')
+        self.assertEqual(2, sum(row['events'] for row in response.context['month_list']))
+
+
+
+    def test_attendance_by_skill_report(self):
+        """Test the average attendance by skill level report"""
+        response = self.client.get('/reports/attendancebyskill')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [(3, 0), (5, 0)],
+            [(row['skill_level'], row['average_attendance']) for row in response.context['skill_list']]
+        )
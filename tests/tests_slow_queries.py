@@ -0,0 +1,62 @@
+#
+# If you need any resources created 
+# before a test is run, do it in setUp(). 
+# Below, set up FN does three things:
+#
+#  1. Grabs a Gamer from the fixtures and makes their user staff.
+#  2. Adds their authentication Token to the request headers.
+#  3. Clears the cache, which holds the report blocks.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+import logging
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Gamer
+
+
+@override_settings(SLOW_QUERY_MS=0)
+class SlowQueryTests(APITestCase):
+
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+    
+    def setUp(self):
+        # Grab the first Gamer object from the database and add their token to the headers
+        self.gamer = Gamer.objects.first()
+        self.gamer.user.is_staff = True
+        self.gamer.user.save()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        # a cached report block would leave its gamer out of the report query
+        cache.clear()
+
+
+
+    def test_slow_query_logged_with_plan(self):
+        """Test that a statement over the threshold is logged with its plan"""
+        with self.assertLogs('levelup.queries.slow', logging.WARNING) as logs:
+            self.client.get('/reports/usergames/1')
+            response = self.client.get('/stats/slowqueries')
+
+        self.assertTrue(any('levelupapi_game AS g' in line and 'plan:' in line
+                            for line in logs.output))
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        report = next(e for e in response.data if 'levelupapi_game AS g' in e['sql'])
+        self.assertEqual(['1'], report['params'])
+        self.assertIn('gamesbyuser.py', report['caller'])
+        self.assertTrue(report['plan'])
+
+
+
+    def test_streamed_body_timed(self):
+        """Test that the queries of a streamed list are timed while it is sent"""
+        with self.assertLogs('levelup.queries.slow', logging.WARNING) as logs:
+            response = self.client.get('/games?stream=1')
+            before = len(logs.output)
+            b''.join(response.streaming_content)
+
+        self.assertTrue(any('levelupapi_game' in line for line in logs.output[before:]))
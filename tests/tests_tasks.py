@@ -0,0 +1,64 @@
+#
+# These tests queue up functions defined in this module and run them the
+# way the run_tasks worker would.
+#
+#  All FNs dealing with integration testing must start with " test_  "
+from django.test import TestCase
+from levelupapi.models import Task
+from levelupapi.tasks import enqueue, queue_depth, run_pending
+
+calls = []
+
+
+def record(value, extra=None):
+    calls.append((value, extra))
+
+
+def explode():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+
+
+    def test_run_task(self):
+        """Test that a queued task is run once with its arguments"""
+        enqueue(record, 1, extra='two')
+
+        self.assertEqual(1, run_pending())
+        self.assertEqual([(1, 'two')], calls)
+        self.assertEqual({Task.DONE: 1}, queue_depth())
+
+        # nothing left to do
+        self.assertEqual(0, run_pending())
+
+
+
+    def test_delayed_task_waits(self):
+        """Test that a task with a delay isn't run before it is due"""
+        enqueue('tests.tests_tasks.record', 1, delay=60)
+
+        self.assertEqual(0, run_pending())
+        self.assertEqual({Task.PENDING: 1}, queue_depth())
+
+
+
+    def test_failed_task_retries(self):
+        """Test that a failing task is retried later, then marked failed"""
+        task = enqueue(explode, max_attempts=2)
+
+        run_pending()
+        task.refresh_from_db()
+        self.assertEqual(Task.PENDING, task.status)
+        self.assertIn('RuntimeError: boom', task.last_error)
+
+        # make the retry due now instead of after the delay
+        Task.objects.update(run_after=task.created_on)
+        run_pending()
+        task.refresh_from_db()
+        self.assertEqual(Task.FAILED, task.status)
+        self.assertEqual(2, task.attempts)